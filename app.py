@@ -1,8 +1,11 @@
 import streamlit as st
-import json
+import html
+import math
 import os
-from datetime import datetime
+import sys
+from datetime import datetime, time as dtime
 from pathlib import Path
+from json_utils import read_json, write_json, replay_jsonl, append_jsonl, write_jsonl, unique_ids
 
 # Configuration de la page
 st.set_page_config(
@@ -12,26 +15,67 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialisation des dossiers
+# Dossiers et fichiers de configuration
 DATA_DIR = Path("data")
-DATA_DIR.mkdir(exist_ok=True)
-(DATA_DIR / "sites").mkdir(exist_ok=True)
-(DATA_DIR / "logs").mkdir(exist_ok=True)
-(DATA_DIR / "credentials").mkdir(exist_ok=True)
-
-# Fichiers de configuration
+CREDENTIALS_DIR = DATA_DIR / "credentials"
 CONFIG_FILE = DATA_DIR / "config.json"
-SITES_FILE = DATA_DIR / "sites.json"
+# Journal des sites en ajout seul (une ligne par création/modification/suppression)
+SITES_FILE = DATA_DIR / "sites.jsonl"
+LEGACY_SITES_FILE = DATA_DIR / "sites.json"
+
+# Chemins en chaîne pour les os.stat exécutés à chaque rerun
+CONFIG_FILE_S = str(CONFIG_FILE)
+SITES_FILE_S = str(SITES_FILE)
+LEGACY_SITES_FILE_S = str(LEGACY_SITES_FILE)
+
+# Nombre de sites affichés par page dans "Gestion des Sites"
+SITES_PAGE_SIZE = 20
+
+# Valeurs par défaut des formulaires de bases relationnelles
+SQL_DB_FIELDS = {
+    "postgresql": {"label": "🐘 PostgreSQL - Base de données relationnelle", "port": 5432, "user": "postgres"},
+    "mysql": {"label": "🐬 MySQL - Base de données relationnelle", "port": 3306, "user": "root"}
+}
+
+# Lignes obsolètes tolérées dans le journal avant compaction
+SITES_LOG_COMPACT_SLACK = 100
+
+# Initialisation des dossiers (une seule fois par processus, pas à chaque rerun)
+@st.cache_resource(show_spinner=False)
+def _ensure_dirs():
+    DATA_DIR.mkdir(exist_ok=True)
+    (DATA_DIR / "sites").mkdir(exist_ok=True)
+    (DATA_DIR / "logs").mkdir(exist_ok=True)
+    CREDENTIALS_DIR.mkdir(exist_ok=True)
+    return True
+
+_ensure_dirs()
 
 # Initialisation de la session state
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 
+def file_mtime(path: str) -> int:
+    """Horodatage du fichier, utilisé comme clé de cache (0 si absent)"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+def sites_mtime() -> int:
+    """Clé de cache des sites (journal, ou ancien sites.json avant migration)"""
+    return file_mtime(SITES_FILE_S) or file_mtime(LEGACY_SITES_FILE_S)
+
+def credentials_file(site_id) -> Path:
+    """Chemin du fichier d'identifiants d'un site"""
+    return CREDENTIALS_DIR / f"{site_id}.json"
+
 # Chargement de la configuration
-def load_config():
-    if CONFIG_FILE.exists():
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
+@st.cache_data(show_spinner=False)
+def load_config(mtime: int = 0):
+    config = read_json(CONFIG_FILE)
+    if config is not None:
+        return config
     return {
         "database": {
             "type": "supabase",
@@ -45,18 +89,141 @@ def load_config():
     }
 
 def save_config(config):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+    write_json(CONFIG_FILE, config)
+    load_config.clear()
 
-def load_sites():
-    if SITES_FILE.exists():
-        with open(SITES_FILE, 'r') as f:
-            return json.load(f)
-    return []
+def _intern_sites(sites):
+    # Les valeurs répétées (type de site) partagent une seule chaîne en mémoire
+    for s in sites:
+        s['type'] = sys.intern(s.get('type', 'E-commerce'))
+    return sites
 
-def save_sites(sites):
-    with open(SITES_FILE, 'w') as f:
-        json.dump(sites, f, indent=2)
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _replay_sites_log(mtime: int = 0):
+    """
+    Relecture du journal des sites : (sites, nombre de lignes). Partagée sans
+    copie (cache_resource) : ne pas modifier les sites renvoyés
+    """
+    if not SITES_FILE.exists():
+        return [], 0
+    return replay_jsonl(SITES_FILE)
+
+@st.cache_data(show_spinner=False)
+def load_sites(mtime: int = 0):
+    if not SITES_FILE.exists():
+        return _intern_sites(unique_ids(read_json(LEGACY_SITES_FILE, default=[])))
+    sites, _ = _replay_sites_log(mtime)
+    return _intern_sites([dict(s) for s in sites])
+
+@st.cache_data(show_spinner=False)
+def auth_sites_view(mtime: int = 0):
+    return [s for s in load_sites(mtime) if s.get('requires_auth', False)]
+
+@st.cache_data(show_spinner=False)
+def sites_columns(mtime: int = 0):
+    """Vue en colonnes des sites pour les agrégations et listes d'options"""
+    sites = load_sites(mtime)
+    return {
+        "ids": tuple(s['id'] for s in sites),
+        "names": tuple(s['name'] for s in sites),
+        "active": tuple(s.get('active', True) for s in sites),
+        "requires_auth": tuple(s.get('requires_auth', False) for s in sites)
+    }
+
+@st.cache_data(show_spinner=False)
+def recent_activity_html(mtime: int = 0):
+    """Panneau "Activité récente" (5 premiers sites) pré-rendu en HTML"""
+    return "\n".join(
+        f"<div>🔗 <b>{html.escape(s['name'])}</b><br>"
+        f"<small>URL: {html.escape(s['url'])}</small><br>"
+        f"<small>Statut: {'✅ Actif' if s.get('active', True) else '❌ Inactif'}</small><hr></div>"
+        for s in load_sites(mtime)[:5]
+    )
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def sites_by_id(mtime: int = 0):
+    """
+    Index id -> site partagé (cache_resource : pas de copie à chaque appel,
+    contrairement à cache_data). Ne pas modifier les sites renvoyés
+    """
+    return {s['id']: s for s in load_sites(mtime)}
+
+def _clear_sites_cache():
+    load_sites.clear()
+    sites_by_id.clear()
+    auth_sites_view.clear()
+    sites_columns.clear()
+    recent_activity_html.clear()
+
+def _append_sites(records):
+    # Migration de l'ancien sites.json au premier enregistrement
+    # (ids en double renumérotés comme à l'affichage, sinon le journal les fusionnerait)
+    if not SITES_FILE.exists() and LEGACY_SITES_FILE.exists():
+        write_jsonl(SITES_FILE, unique_ids(read_json(LEGACY_SITES_FILE, default=[])))
+    # Taille du journal avant l'ajout : relecture déjà en cache depuis l'affichage
+    # de la page, l'enregistrement reste un simple ajout en fin de fichier
+    sites, lines = _replay_sites_log(file_mtime(SITES_FILE_S))
+    append_jsonl(SITES_FILE, records)
+    # Compaction quand les lignes obsolètes s'accumulent
+    if lines + len(records) > 2 * len(sites) + SITES_LOG_COMPACT_SLACK:
+        write_jsonl(SITES_FILE, replay_jsonl(SITES_FILE)[0])
+    _clear_sites_cache()
+
+def save_site(site):
+    """Créer ou mettre à jour un site (ajout d'une ligne au journal)"""
+    _append_sites([site])
+
+def delete_site(site_id):
+    """Supprimer un site (ajout d'une ligne de suppression au journal)"""
+    _append_sites([{"id": site_id, "_deleted": True}])
+
+def parse_hhmm(value: str) -> dtime:
+    """Convertir une heure "HH:MM" en objet time (sans strptime)"""
+    hour, minute = value.split(':')
+    return dtime(int(hour), int(minute))
+
+def format_hhmm(value: dtime) -> str:
+    """Formater un objet time en "HH:MM" (sans strftime)"""
+    return f"{value.hour:02d}:{value.minute:02d}"
+
+@st.fragment
+def site_card(site_id):
+    """Fiche d'un site ; activer/désactiver ne relance que cette fiche"""
+    site = sites_by_id(sites_mtime()).get(site_id)
+    if site is None:
+        return  # Supprimé depuis (autre session)
+    is_active = site.get('active', True)
+    with st.expander(f"🔗 {site['name']} - {site['url']}", expanded=False):
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            st.write(f"**URL:** {site['url']}")
+            st.write(f"**Type:** {site.get('type', 'E-commerce')}")
+            st.write(f"**Authentification:** {'Oui' if site.get('requires_auth', False) else 'Non'}")
+            st.write(f"**Statut:** {'✅ Actif' if is_active else '❌ Inactif'}")
+            
+            if site.get('selectors'):
+                st.write("**Sélecteurs configurés:**")
+                for key, value in site['selectors'].items():
+                    st.code(f"{key}: {value}", language="css")
+        
+        with col2:
+            if st.button("🗑️ Supprimer", key=f"del_{site_id}"):
+                delete_site(site_id)
+                st.rerun()
+            
+            if st.button("⏸️ Désactiver" if is_active else "▶️ Activer", key=f"toggle_{site_id}"):
+                save_site({**site, 'active': not is_active})
+                st.rerun(scope="fragment")
+
+@st.fragment
+def launch_collection_block():
+    if st.button("🚀 Lancer une collecte maintenant", type="primary", use_container_width=True):
+        with st.spinner("Collecte en cours..."):
+            st.success("Collecte terminée ! (Fonctionnalité en cours d'implémentation)")
+
+# Horodatage unique pour tout le rerun
+now = datetime.now()
 
 # Sidebar navigation
 with st.sidebar:
@@ -70,7 +237,7 @@ with st.sidebar:
     )
     
     st.markdown("---")
-    st.caption(f"Dernière mise à jour: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+    st.caption(f"Dernière mise à jour: {now.strftime('%d/%m/%Y %H:%M')}")
 
 # Page Dashboard
 if page == "📊 Dashboard":
@@ -78,14 +245,14 @@ if page == "📊 Dashboard":
     
     col1, col2, col3, col4 = st.columns(4)
     
-    sites = load_sites()
+    sites = load_sites(sites_mtime())
+    columns = sites_columns(sites_mtime())
     
     with col1:
-        st.metric("Sites surveillés", len(sites))
+        st.metric("Sites surveillés", len(columns['ids']))
     
     with col2:
-        active_sites = sum(1 for s in sites if s.get('active', True))
-        st.metric("Sites actifs", active_sites)
+        st.metric("Sites actifs", sum(columns['active']))
     
     with col3:
         st.metric("Produits collectés", "0")
@@ -100,12 +267,7 @@ if page == "📊 Dashboard":
     with col1:
         st.subheader("📈 Activité récente")
         if sites:
-            for site in sites[:5]:
-                with st.container():
-                    st.write(f"🔗 **{site['name']}**")
-                    st.caption(f"URL: {site['url']}")
-                    st.caption(f"Statut: {'✅ Actif' if site.get('active', True) else '❌ Inactif'}")
-                    st.markdown("---")
+            st.markdown(recent_activity_html(sites_mtime()), unsafe_allow_html=True)
         else:
             st.info("Aucun site configuré. Ajoutez votre premier site dans 'Gestion des Sites'.")
     
@@ -115,9 +277,7 @@ if page == "📊 Dashboard":
         
     st.markdown("---")
     
-    if st.button("🚀 Lancer une collecte maintenant", type="primary", use_container_width=True):
-        with st.spinner("Collecte en cours..."):
-            st.success("Collecte terminée ! (Fonctionnalité en cours d'implémentation)")
+    launch_collection_block()
 
 # Page Gestion des Sites
 elif page == "🌐 Gestion des Sites":
@@ -125,35 +285,20 @@ elif page == "🌐 Gestion des Sites":
     
     tab1, tab2 = st.tabs(["📋 Liste des sites", "➕ Ajouter un site"])
     
+    # Chargé une seule fois pour les deux onglets
+    sites = load_sites(sites_mtime())
+    
     with tab1:
-        sites = load_sites()
-        
         if sites:
-            for idx, site in enumerate(sites):
-                with st.expander(f"🔗 {site['name']} - {site['url']}", expanded=False):
-                    col1, col2 = st.columns([3, 1])
-                    
-                    with col1:
-                        st.write(f"**URL:** {site['url']}")
-                        st.write(f"**Type:** {site.get('type', 'E-commerce')}")
-                        st.write(f"**Authentification:** {'Oui' if site.get('requires_auth', False) else 'Non'}")
-                        st.write(f"**Statut:** {'✅ Actif' if site.get('active', True) else '❌ Inactif'}")
-                        
-                        if site.get('selectors'):
-                            st.write("**Sélecteurs configurés:**")
-                            for key, value in site['selectors'].items():
-                                st.code(f"{key}: {value}", language="css")
-                    
-                    with col2:
-                        if st.button("🗑️ Supprimer", key=f"del_{idx}"):
-                            sites.pop(idx)
-                            save_sites(sites)
-                            st.rerun()
-                        
-                        if st.button("⏸️ Désactiver" if site.get('active', True) else "▶️ Activer", key=f"toggle_{idx}"):
-                            sites[idx]['active'] = not site.get('active', True)
-                            save_sites(sites)
-                            st.rerun()
+            # Pagination : seuls les sites de la page courante sont rendus
+            page_count = math.ceil(len(sites) / SITES_PAGE_SIZE)
+            current_page = 1
+            if page_count > 1:
+                current_page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+            start = (current_page - 1) * SITES_PAGE_SIZE
+            
+            for site in sites[start:start + SITES_PAGE_SIZE]:
+                site_card(site['id'])
         else:
             st.info("Aucun site configuré. Ajoutez votre premier site dans l'onglet 'Ajouter un site'.")
     
@@ -189,26 +334,23 @@ elif page == "🌐 Gestion des Sites":
             
             if submitted:
                 if name and url:
-                    sites = load_sites()
-                    
                     new_site = {
-                        "id": len(sites) + 1,
+                        "id": max((s['id'] for s in sites), default=0) + 1,
                         "name": name,
                         "url": url,
                         "type": site_type,
                         "requires_auth": requires_auth,
                         "active": True,
-                        "created_at": datetime.now().isoformat(),
+                        "created_at": now.isoformat(),
                         "selectors": {
                             "brand": selector_brand,
                             "model": selector_model,
                             "finish": selector_finish,
                             "specs": selector_specs
-                        } if any([selector_brand, selector_model, selector_finish, selector_specs]) else None
+                        } if selector_brand or selector_model or selector_finish or selector_specs else None
                     }
                     
-                    sites.append(new_site)
-                    save_sites(sites)
+                    save_site(new_site)
                     
                     st.success(f"✅ Site '{name}' ajouté avec succès!")
                     st.rerun()
@@ -221,7 +363,7 @@ elif page == "⚙️ Configuration":
     
     tab1, tab2, tab3 = st.tabs(["🗄️ Base de données", "🔐 Identifiants", "⏰ Planification"])
     
-    config = load_config()
+    config = load_config(file_mtime(CONFIG_FILE_S))
     
     with tab1:
         st.subheader("Configuration de la base de données")
@@ -240,20 +382,13 @@ elif page == "⚙️ Configuration":
                 key = st.text_input("Clé API (anon key)", value=config['database'].get('key', ''),
                                    type="password", placeholder="eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...")
             
-            elif db_type == "postgresql":
-                st.info("🐘 PostgreSQL - Base de données relationnelle")
-                host = st.text_input("Hôte", placeholder="localhost")
-                port = st.number_input("Port", value=5432)
-                database = st.text_input("Nom de la base", placeholder="scraper_db")
-                user = st.text_input("Utilisateur", placeholder="postgres")
-                password = st.text_input("Mot de passe", type="password")
-            
-            elif db_type == "mysql":
-                st.info("🐬 MySQL - Base de données relationnelle")
+            elif db_type in SQL_DB_FIELDS:
+                fields = SQL_DB_FIELDS[db_type]
+                st.info(fields["label"])
                 host = st.text_input("Hôte", placeholder="localhost")
-                port = st.number_input("Port", value=3306)
+                port = st.number_input("Port", value=fields["port"])
                 database = st.text_input("Nom de la base", placeholder="scraper_db")
-                user = st.text_input("Utilisateur", placeholder="root")
+                user = st.text_input("Utilisateur", placeholder=fields["user"])
                 password = st.text_input("Mot de passe", type="password")
             
             else:  # sqlite
@@ -276,24 +411,22 @@ elif page == "⚙️ Configuration":
         st.subheader("Gestion des identifiants")
         st.caption("Pour les sites nécessitant une authentification")
         
-        sites = load_sites()
-        auth_sites = [s for s in sites if s.get('requires_auth', False)]
+        auth_sites = auth_sites_view(sites_mtime())
         
         if auth_sites:
             for site in auth_sites:
+                site_id = site['id']
                 with st.expander(f"🔐 {site['name']}"):
-                    with st.form(f"auth_form_{site['id']}"):
-                        username = st.text_input("Nom d'utilisateur / Email", key=f"user_{site['id']}")
-                        password = st.text_input("Mot de passe", type="password", key=f"pass_{site['id']}")
+                    with st.form(f"auth_form_{site_id}"):
+                        username = st.text_input("Nom d'utilisateur / Email", key=f"user_{site_id}")
+                        password = st.text_input("Mot de passe", type="password", key=f"pass_{site_id}")
                         
                         if st.form_submit_button("💾 Sauvegarder les identifiants"):
                             # Sauvegarder de manière sécurisée (à améliorer avec encryption)
-                            cred_file = DATA_DIR / "credentials" / f"{site['id']}.json"
-                            with open(cred_file, 'w') as f:
-                                json.dump({
-                                    "username": username,
-                                    "password": password
-                                }, f)
+                            write_json(credentials_file(site_id), {
+                                "username": username,
+                                "password": password
+                            }, indent=False)
                             st.success("✅ Identifiants sauvegardés!")
         else:
             st.info("Aucun site nécessitant une authentification configuré.")
@@ -306,14 +439,15 @@ elif page == "⚙️ Configuration":
                                  value=config['scheduler'].get('enabled', False))
             
             time = st.time_input("Heure de la collecte", 
-                                value=datetime.strptime(config['scheduler'].get('time', '09:00'), '%H:%M').time())
+                                value=parse_hhmm(config['scheduler'].get('time', '09:00')))
             
             st.info("🤖 La collecte s'exécutera automatiquement tous les jours à l'heure configurée")
             
             if st.form_submit_button("💾 Sauvegarder la planification", type="primary"):
                 config['scheduler'] = {
+                    **config['scheduler'],
                     "enabled": enabled,
-                    "time": time.strftime('%H:%M')
+                    "time": format_hhmm(time)
                 }
                 save_config(config)
                 st.success("✅ Planification configurée!")
@@ -326,7 +460,7 @@ elif page == "📋 Logs":
     with col1:
         filter_status = st.selectbox("Statut", ["Tous", "Succès", "Erreur", "En cours"])
     with col2:
-        filter_site = st.selectbox("Site", ["Tous"] + [s['name'] for s in load_sites()])
+        filter_site = st.selectbox("Site", ("Tous", *sites_columns(sites_mtime())['names']))
     with col3:
         filter_date = st.date_input("Date")
     
@@ -359,8 +493,8 @@ elif page == "📤 Export":
         date_range = st.date_input("Période", value=[])
     
     with col2:
-        sites = load_sites()
-        selected_sites = st.multiselect("Sites à exporter", [s['name'] for s in sites], default=[s['name'] for s in sites])
+        site_names = sites_columns(sites_mtime())['names']
+        selected_sites = st.multiselect("Sites à exporter", site_names, default=site_names)
     
     include_fields = st.multiselect(
         "Champs à inclure",
@@ -1,49 +1,192 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Protocol, runtime_checkable
+import atexit
 import logging
+import sqlite3
+import threading
+import time
 from datetime import datetime
-from abc import ABC, abstractmethod
+from functools import lru_cache
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from json_utils import dumps as json_dumps
+
+# Pilotes optionnels : importés une seule fois, None s'ils ne sont pas installés
+try:
+    from supabase import create_client
+except ImportError:
+    create_client = None
+
+try:
+    from psycopg.rows import dict_row
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    dict_row = ConnectionPool = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class DatabaseInterface(ABC):
-    """Interface abstraite pour les différentes bases de données"""
+@runtime_checkable
+class DatabaseInterface(Protocol):
+    """Interface (typage structurel) pour les différentes bases de données"""
     
-    @abstractmethod
     def connect(self):
         """Établir la connexion à la base de données"""
-        pass
+        ...
     
-    @abstractmethod
     def create_tables(self):
         """Créer les tables nécessaires"""
-        pass
+        ...
     
-    @abstractmethod
-    def insert_products(self, products: List[Dict]) -> int:
+    def insert_products(self, products: List[Dict], site_source: str = "") -> int:
         """Insérer des produits dans la base"""
-        pass
+        ...
     
-    @abstractmethod
-    def get_products(self, filters: Optional[Dict] = None) -> List[Dict]:
+    def get_products(self, filters: Optional[Dict] = None, limit: int = 100) -> List[Dict]:
         """Récupérer des produits"""
-        pass
+        ...
+    
+    def count_products(self) -> int:
+        """Compter les produits en base"""
+        ...
     
-    @abstractmethod
     def update_product(self, product_id: int, data: Dict) -> bool:
         """Mettre à jour un produit"""
-        pass
+        ...
     
-    @abstractmethod
     def delete_product(self, product_id: int) -> bool:
         """Supprimer un produit"""
-        pass
+        ...
     
-    @abstractmethod
     def close(self):
         """Fermer la connexion"""
-        pass
+        ...
+
+
+# Champs d'un produit renvoyés par les scrapers
+PRODUCT_FIELDS = (
+    'marque', 'modele', 'finitions', 'caracteristiques',
+    'prix', 'url', 'image', 'disponibilite'
+)
+
+# Extraction des champs d'un produit en un seul appel (ordre des colonnes INSERT)
+_EMPTY_PRODUCT = dict.fromkeys(PRODUCT_FIELDS, '')
+_pick_product = itemgetter(*PRODUCT_FIELDS)
+
+# Index unique empêchant les doublons (même produit, même site) d'une collecte à l'autre.
+# Partiel : les produits sans URL ne sont jamais considérés comme doublons
+UNIQUE_SITE_URL_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_produits_site_url "
+    "ON produits(site_source, url) WHERE url <> ''"
+)
+
+# Colonnes de la table produits autorisées dans les filtres et mises à jour
+PRODUCT_COLUMNS = frozenset((
+    'id', 'marque', 'modele', 'finitions', 'caracteristiques', 'prix', 'url',
+    'image', 'disponibilite', 'site_source', 'date_collecte', 'created_at', 'updated_at'
+))
+
+
+def _check_columns(keys: tuple):
+    """Refuser toute colonne hors de la liste blanche (injection SQL)"""
+    unknown = set(keys) - PRODUCT_COLUMNS
+    if unknown:
+        raise ValueError(f"Colonnes inconnues: {', '.join(sorted(unknown))}")
+
+
+@lru_cache(maxsize=128)
+def _select_sql(keys: tuple, placeholder: str) -> str:
+    """Requête SELECT construite une seule fois par jeu de filtres"""
+    _check_columns(keys)
+    query = "SELECT * FROM produits WHERE 1=1"
+    for key in keys:
+        query += f" AND {key} = {placeholder}"
+    return query + f" LIMIT {placeholder}"
+
+
+@lru_cache(maxsize=128)
+def _update_sql(keys: tuple, placeholder: str, now_expr: str) -> str:
+    """Requête UPDATE construite une seule fois par jeu de colonnes"""
+    _check_columns(keys)
+    set_clause = ", ".join(f"{key} = {placeholder}" for key in keys)
+    return f"UPDATE produits SET {set_clause}, updated_at = {now_expr} WHERE id = {placeholder}"
+
+
+class QueryCache:
+    """
+    Cache LRU à durée de vie limitée pour les résultats de get_products.
+    Vidé entièrement à chaque écriture (insert / update / delete) ; chaque
+    vidage change de génération, et un résultat lu avant une écriture
+    (génération précédente) n'est pas remis en cache.
+    """
+    
+    def __init__(self, maxsize: int = 256, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+    
+    @staticmethod
+    def make_key(filters: Optional[Dict], limit: int) -> Optional[tuple]:
+        """Clé de cache (filtres actifs + limite), None si non hachable"""
+        items = tuple(sorted(((k, v) for k, v in (filters or {}).items() if v), key=lambda kv: kv[0]))
+        key = (items, limit)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    def get(self, key: Optional[tuple]) -> Optional[List[Dict]]:
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, rows = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        # Copie de chaque ligne : l'appelant peut modifier ses dictionnaires
+        # sans altérer le cache ni les résultats servis aux autres threads
+        return [dict(r) for r in rows]
+    
+    @property
+    def generation(self) -> int:
+        """Génération courante, à relever avant d'exécuter la requête"""
+        return self._generation
+    
+    def set(self, key: Optional[tuple], rows: List[Dict], generation: int):
+        if key is None:
+            return
+        rows = [dict(r) for r in rows]
+        with self._lock:
+            if generation != self._generation:
+                return  # Écriture survenue pendant la lecture : résultat périmé
+            self._data[key] = (time.monotonic() + self.ttl, rows)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+
+# Taille des lots envoyés à l'API REST Supabase et nombre de requêtes simultanées
+SUPABASE_BATCH_SIZE = 500
+SUPABASE_MAX_WORKERS = 8
+
+# Colonnes de l'index unique utilisé pour ignorer les doublons
+SUPABASE_CONFLICT_COLUMNS = "site_source,url"
+
+# Code d'erreur PostgreSQL : aucun index unique ne correspond à ON CONFLICT
+PG_NO_UNIQUE_INDEX = "42P10"
 
 
 class SupabaseDB(DatabaseInterface):
@@ -54,17 +197,21 @@ class SupabaseDB(DatabaseInterface):
         self.key = key
         self.client = None
         self.table_name = "produits"
+        self._query_cache = QueryCache()
+        # Ignorer les doublons (site_source, url) ; désactivé si l'index unique est absent
+        self.ignore_duplicates = True
     
     def connect(self):
-        """Établir la connexion à Supabase"""
-        try:
-            from supabase import create_client, Client
-            self.client: Client = create_client(self.url, self.key)
-            logger.info("Connexion à Supabase établie")
+        """Établir la connexion à Supabase (le client existant est réutilisé)"""
+        if self.client:
             return True
-        except ImportError:
+        if create_client is None:
             logger.error("Module supabase non installé. Installez-le avec: pip install supabase")
             return False
+        try:
+            self.client = create_client(self.url, self.key)
+            logger.info("Connexion à Supabase établie")
+            return True
         except Exception as e:
             logger.error(f"Erreur de connexion à Supabase: {str(e)}")
             return False
@@ -98,6 +245,9 @@ class SupabaseDB(DatabaseInterface):
         CREATE INDEX IF NOT EXISTS idx_produits_site ON produits(site_source);
         CREATE INDEX IF NOT EXISTS idx_produits_date ON produits(date_collecte);
         
+        -- Dédoublonnage des produits (les URL vides sont envoyées à NULL)
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_produits_site_url ON produits(site_source, url);
+        
         -- Trigger pour mettre à jour updated_at automatiquement
         CREATE OR REPLACE FUNCTION update_updated_at_column()
         RETURNS TRIGGER AS $$
@@ -122,32 +272,78 @@ class SupabaseDB(DatabaseInterface):
             return 0
         
         try:
-            # Préparer les données
-            products_data = []
-            for product in products:
-                products_data.append({
-                    'marque': product.get('marque', ''),
-                    'modele': product.get('modele', ''),
-                    'finitions': product.get('finitions', ''),
-                    'caracteristiques': product.get('caracteristiques', ''),
-                    'prix': product.get('prix', ''),
-                    'url': product.get('url', ''),
-                    'image': product.get('image', ''),
-                    'disponibilite': product.get('disponibilite', ''),
+            # Préparer les données (un seul horodatage pour tout le lot)
+            # Toutes les lignes gardent les mêmes clés : PostgREST l'exige pour un insert groupé
+            now_iso = datetime.now().isoformat()
+            products_data = [
+                {
+                    **{field: product.get(field, '') for field in PRODUCT_FIELDS},
+                    # NULL plutôt que '' : plusieurs produits sans URL ne sont pas des doublons
+                    'url': product.get('url') or None,
                     'site_source': site_source,
-                    'date_collecte': datetime.now().isoformat()
-                })
+                    'date_collecte': now_iso
+                }
+                for product in products
+            ]
             
-            # Insérer dans Supabase
-            response = self.client.table(self.table_name).insert(products_data).execute()
+            # Insérer dans Supabase par lots envoyés en parallèle
+            chunks = [products_data[i:i + SUPABASE_BATCH_SIZE]
+                      for i in range(0, len(products_data), SUPABASE_BATCH_SIZE)]
             
-            logger.info(f"{len(products_data)} produits insérés dans Supabase")
-            return len(products_data)
+            def insert_chunk(chunk: List[Dict]) -> int:
+                try:
+                    self._insert_chunk(chunk)
+                    return len(chunk)
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'insertion d'un lot dans Supabase: {str(e)}")
+                    return 0
+            
+            with ThreadPoolExecutor(max_workers=min(SUPABASE_MAX_WORKERS, len(chunks) or 1)) as executor:
+                inserted = sum(executor.map(insert_chunk, chunks))
+            self._query_cache.clear()
+            
+            logger.info(f"{inserted} produits insérés dans Supabase")
+            return inserted
             
         except Exception as e:
             logger.error(f"Erreur lors de l'insertion dans Supabase: {str(e)}")
             return 0
     
+    def _insert_chunk(self, chunk: List[Dict]):
+        """
+        Envoyer un lot à PostgREST. Le corps est encodé avec orjson et
+        "return=minimal" évite que le serveur renvoie (et qu'on décode) les lignes insérées
+        """
+        ignore_duplicates = self.ignore_duplicates
+        session = getattr(getattr(self.client, 'postgrest', None), 'session', None)
+        
+        try:
+            if session is None:
+                table = self.client.table(self.table_name)
+                if ignore_duplicates:
+                    table.upsert(chunk, on_conflict=SUPABASE_CONFLICT_COLUMNS, ignore_duplicates=True).execute()
+                else:
+                    table.insert(chunk).execute()
+                return
+            
+            prefer = "return=minimal,resolution=ignore-duplicates" if ignore_duplicates else "return=minimal"
+            response = session.post(
+                f"/{self.table_name}",
+                params={"on_conflict": SUPABASE_CONFLICT_COLUMNS} if ignore_duplicates else None,
+                content=json_dumps(chunk),
+                headers={"Content-Type": "application/json", "Prefer": prefer}
+            )
+            if ignore_duplicates and response.status_code == 400 and PG_NO_UNIQUE_INDEX in response.text:
+                raise ValueError(response.text)
+            response.raise_for_status()
+        except Exception as e:
+            if not (ignore_duplicates and PG_NO_UNIQUE_INDEX in str(e)):
+                raise
+            # Table créée avant l'index unique : insertion simple, sans dédoublonnage
+            logger.warning("Index unique (site_source, url) absent dans Supabase, doublons non filtrés")
+            self.ignore_duplicates = False
+            self._insert_chunk(chunk)
+    
     def get_products(self, filters: Optional[Dict] = None, limit: int = 100) -> List[Dict]:
         """Récupérer des produits depuis Supabase"""
         if not self.client:
@@ -155,6 +351,12 @@ class SupabaseDB(DatabaseInterface):
             return []
         
         try:
+            cache_key = QueryCache.make_key(filters, limit)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            generation = self._query_cache.generation
+            
             query = self.client.table(self.table_name).select("*")
             
             # Appliquer les filtres
@@ -164,12 +366,26 @@ class SupabaseDB(DatabaseInterface):
                         query = query.eq(key, value)
             
             response = query.limit(limit).execute()
+            self._query_cache.set(cache_key, response.data, generation)
             return response.data
             
         except Exception as e:
             logger.error(f"Erreur lors de la récupération depuis Supabase: {str(e)}")
             return []
     
+    def count_products(self) -> int:
+        """Compter les produits dans Supabase (count côté serveur, une seule ligne renvoyée)"""
+        if not self.client:
+            logger.error("Client Supabase non connecté")
+            return 0
+        
+        try:
+            response = self.client.table(self.table_name).select("id", count="exact").limit(1).execute()
+            return response.count or 0
+        except Exception as e:
+            logger.error(f"Erreur lors du comptage dans Supabase: {str(e)}")
+            return 0
+    
     def update_product(self, product_id: int, data: Dict) -> bool:
         """Mettre à jour un produit dans Supabase"""
         if not self.client:
@@ -178,6 +394,7 @@ class SupabaseDB(DatabaseInterface):
         
         try:
             response = self.client.table(self.table_name).update(data).eq('id', product_id).execute()
+            self._query_cache.clear()
             logger.info(f"Produit {product_id} mis à jour")
             return True
         except Exception as e:
@@ -192,6 +409,7 @@ class SupabaseDB(DatabaseInterface):
         
         try:
             response = self.client.table(self.table_name).delete().eq('id', product_id).execute()
+            self._query_cache.clear()
             logger.info(f"Produit {product_id} supprimé")
             return True
         except Exception as e:
@@ -203,22 +421,50 @@ class SupabaseDB(DatabaseInterface):
         logger.info("Connexion Supabase fermée")
 
 
+# Réglages SQLite appliqués à la connexion : journal WAL (lecteurs concurrents,
+# moins de fsync), cache de 64 Mo, tables temporaires en mémoire, mmap de 256 Mo
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "cache_size=-65536",
+    "busy_timeout=5000"
+)
+
+
 class SQLiteDB(DatabaseInterface):
     """Gestionnaire de base de données SQLite"""
     
-    def __init__(self, db_path: str = "data/scraper.db"):
+    def __init__(self, db_path: str = "data/scraper.db", ephemeral: bool = False):
         self.db_path = db_path
+        # Mode éphémère : base en mémoire, recopiée sur disque une seule fois à la fermeture
+        self.ephemeral = ephemeral
         self.conn = None
-        self.cursor = None
+        # La connexion est partagée entre threads : tous les accès sont sérialisés
+        # (sur une même connexion, WAL n'isole pas une lecture d'une écriture en cours)
+        self._conn_lock = threading.RLock()
+        self._query_cache = QueryCache()
     
     def connect(self):
         """Établir la connexion à SQLite"""
         try:
-            import sqlite3
-            self.conn = sqlite3.connect(self.db_path)
+            # Mode autocommit : les transactions d'écriture sont ouvertes explicitement (BEGIN)
+            target = ":memory:" if self.ephemeral else self.db_path
+            self.conn = sqlite3.connect(target, isolation_level=None, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
-            self.cursor = self.conn.cursor()
-            logger.info(f"Connexion à SQLite établie: {self.db_path}")
+            for pragma in SQLITE_PRAGMAS:
+                self.conn.execute(f"PRAGMA {pragma}")
+            
+            if self.ephemeral:
+                # Partir du contenu existant : la recopie finale remplace tout le fichier
+                disk = sqlite3.connect(self.db_path)
+                try:
+                    disk.backup(self.conn)
+                finally:
+                    disk.close()
+                atexit.register(self._flush_to_disk)
+            logger.info(f"Connexion à SQLite établie: {self.db_path}" + (" (en mémoire)" if self.ephemeral else ""))
             return True
         except Exception as e:
             logger.error(f"Erreur de connexion à SQLite: {str(e)}")
@@ -227,30 +473,35 @@ class SQLiteDB(DatabaseInterface):
     def create_tables(self):
         """Créer les tables SQLite"""
         try:
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS produits (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    marque TEXT,
-                    modele TEXT NOT NULL,
-                    finitions TEXT,
-                    caracteristiques TEXT,
-                    prix TEXT,
-                    url TEXT,
-                    image TEXT,
-                    disponibilite TEXT,
-                    site_source TEXT,
-                    date_collecte TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Créer des index
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_marque ON produits(marque)")
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_modele ON produits(modele)")
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_site ON produits(site_source)")
-            
-            self.conn.commit()
+            with self._conn_lock:
+                cursor = self.conn.cursor()
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS produits (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        marque TEXT,
+                        modele TEXT NOT NULL,
+                        finitions TEXT,
+                        caracteristiques TEXT,
+                        prix TEXT,
+                        url TEXT,
+                        image TEXT,
+                        disponibilite TEXT,
+                        site_source TEXT,
+                        date_collecte TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # Créer des index
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_marque ON produits(marque)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_modele ON produits(modele)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_site ON produits(site_source)")
+                
+                try:
+                    cursor.execute(UNIQUE_SITE_URL_INDEX)
+                except sqlite3.IntegrityError:
+                    logger.warning("Doublons (site_source, url) existants : index unique non créé")
             logger.info("Tables SQLite créées")
             return True
         except Exception as e:
@@ -260,68 +511,80 @@ class SQLiteDB(DatabaseInterface):
     def insert_products(self, products: List[Dict], site_source: str = "") -> int:
         """Insérer des produits dans SQLite"""
         try:
-            count = 0
-            for product in products:
-                self.cursor.execute("""
-                    INSERT INTO produits (
-                        marque, modele, finitions, caracteristiques, 
-                        prix, url, image, disponibilite, site_source, date_collecte
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    product.get('marque', ''),
-                    product.get('modele', ''),
-                    product.get('finitions', ''),
-                    product.get('caracteristiques', ''),
-                    product.get('prix', ''),
-                    product.get('url', ''),
-                    product.get('image', ''),
-                    product.get('disponibilite', ''),
-                    site_source,
-                    datetime.now().isoformat()
-                ))
-                count += 1
+            now_iso = datetime.now().isoformat()
+            rows = [
+                (*_pick_product({**_EMPTY_PRODUCT, **product}), site_source, now_iso)
+                for product in products
+            ]
+            
+            # Une seule transaction et un seul appel pour tout le lot
+            with self._conn_lock:
+                cursor = self.conn.cursor()
+                try:
+                    cursor.execute("BEGIN")
+                    cursor.executemany("""
+                        INSERT INTO produits (
+                            marque, modele, finitions, caracteristiques, 
+                            prix, url, image, disponibilite, site_source, date_collecte
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT DO NOTHING
+                    """, rows)
+                    count = cursor.rowcount
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+                finally:
+                    # Aussi après un rollback : une lecture a pu voir les lignes non validées
+                    self._query_cache.clear()
             
-            self.conn.commit()
-            logger.info(f"{count} produits insérés dans SQLite")
+            logger.info(f"{count} produits insérés dans SQLite ({len(rows) - count} doublons ignorés)")
             return count
         except Exception as e:
             logger.error(f"Erreur insertion SQLite: {str(e)}")
-            self.conn.rollback()
             return 0
     
     def get_products(self, filters: Optional[Dict] = None, limit: int = 100) -> List[Dict]:
         """Récupérer des produits depuis SQLite"""
         try:
-            query = "SELECT * FROM produits WHERE 1=1"
-            params = []
+            cache_key = QueryCache.make_key(filters, limit)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            generation = self._query_cache.generation
             
-            if filters:
-                for key, value in filters.items():
-                    if value:
-                        query += f" AND {key} = ?"
-                        params.append(value)
+            active = {k: v for k, v in (filters or {}).items() if v}
+            keys = tuple(sorted(active))
+            query = _select_sql(keys, "?")
+            params = [active[k] for k in keys] + [limit]
             
-            query += f" LIMIT {limit}"
+            with self._conn_lock:
+                rows = [dict(row) for row in self.conn.execute(query, params).fetchall()]
             
-            self.cursor.execute(query, params)
-            rows = self.cursor.fetchall()
-            
-            return [dict(row) for row in rows]
+            self._query_cache.set(cache_key, rows, generation)
+            return rows
         except Exception as e:
             logger.error(f"Erreur récupération SQLite: {str(e)}")
             return []
     
+    def count_products(self) -> int:
+        """Compter les produits dans SQLite"""
+        try:
+            with self._conn_lock:
+                return self.conn.execute("SELECT COUNT(*) FROM produits").fetchone()[0]
+        except Exception as e:
+            logger.error(f"Erreur comptage SQLite: {str(e)}")
+            return 0
+    
     def update_product(self, product_id: int, data: Dict) -> bool:
         """Mettre à jour un produit dans SQLite"""
         try:
-            set_clause = ", ".join([f"{key} = ?" for key in data.keys()])
-            values = list(data.values()) + [product_id]
+            keys = tuple(sorted(data))
+            values = [data[k] for k in keys] + [product_id]
             
-            self.cursor.execute(
-                f"UPDATE produits SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                values
-            )
-            self.conn.commit()
+            with self._conn_lock:
+                self.conn.execute(_update_sql(keys, "?", "CURRENT_TIMESTAMP"), values)
+            self._query_cache.clear()
             logger.info(f"Produit {product_id} mis à jour")
             return True
         except Exception as e:
@@ -331,83 +594,156 @@ class SQLiteDB(DatabaseInterface):
     def delete_product(self, product_id: int) -> bool:
         """Supprimer un produit de SQLite"""
         try:
-            self.cursor.execute("DELETE FROM produits WHERE id = ?", (product_id,))
-            self.conn.commit()
+            with self._conn_lock:
+                self.conn.execute("DELETE FROM produits WHERE id = ?", (product_id,))
+            self._query_cache.clear()
             logger.info(f"Produit {product_id} supprimé")
             return True
         except Exception as e:
             logger.error(f"Erreur suppression SQLite: {str(e)}")
             return False
     
+    def _flush_to_disk(self):
+        """Recopier la base en mémoire dans le fichier SQLite (mode éphémère)"""
+        if not self.conn:
+            return
+        try:
+            with self._conn_lock:
+                disk = sqlite3.connect(self.db_path)
+                try:
+                    self.conn.backup(disk)
+                finally:
+                    disk.close()
+            logger.info(f"Base en mémoire sauvegardée: {self.db_path}")
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde SQLite sur disque: {str(e)}")
+    
     def close(self):
         """Fermer la connexion SQLite"""
         if self.conn:
+            if self.ephemeral:
+                self._flush_to_disk()
+                atexit.unregister(self._flush_to_disk)
             self.conn.close()
+            self.conn = None
             logger.info("Connexion SQLite fermée")
 
 
+# Durée de vie maximale d'une connexion du pool avant recyclage
+PG_POOL_RECYCLE_SECONDS = 30 * 60
+
+# Délai maximal d'ouverture des connexions initiales du pool
+PG_CONNECT_TIMEOUT_SECONDS = 10
+
+# Inactivité au-delà de laquelle une connexion est vérifiée (SELECT 1) avant d'être prêtée
+PG_IDLE_CHECK_SECONDS = PG_POOL_RECYCLE_SECONDS
+
+
+def _mark_idle(conn):
+    """Callback `reset` du pool : heure de retour de la connexion dans le pool"""
+    conn._idle_since = time.monotonic()
+
+
+def _check_if_idle(conn):
+    """Callback `check` du pool : ne vérifier que les connexions restées longtemps inactives"""
+    idle_since = getattr(conn, '_idle_since', None)
+    if idle_since is not None and time.monotonic() - idle_since > PG_IDLE_CHECK_SECONDS:
+        ConnectionPool.check_connection(conn)
+
+# À partir de ce nombre de lignes, l'insertion passe par COPY plutôt que INSERT
+PG_COPY_MIN_ROWS = 200
+
+
 class PostgreSQLDB(DatabaseInterface):
-    """Gestionnaire de base de données PostgreSQL"""
+    """Gestionnaire de base de données PostgreSQL (pool de connexions)"""
     
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 min_connections: int = 2, max_connections: int = 10):
         self.host = host
         self.port = port
         self.database = database
         self.user = user
         self.password = password
-        self.conn = None
-        self.cursor = None
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.pool = None
+        self._query_cache = QueryCache()
     
     def connect(self):
-        """Établir la connexion à PostgreSQL"""
+        """Créer le pool de connexions PostgreSQL (psycopg 3)"""
+        if ConnectionPool is None:
+            logger.error("Module psycopg non installé. Installez-le avec: pip install \"psycopg[binary,pool]\"")
+            return False
         try:
-            import psycopg2
-            from psycopg2.extras import RealDictCursor
-            
-            self.conn = psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.user,
-                password=self.password
+            self.pool = ConnectionPool(
+                min_size=self.min_connections,
+                max_size=self.max_connections,
+                kwargs={
+                    'host': self.host,
+                    'port': self.port,
+                    'dbname': self.database,
+                    'user': self.user,
+                    'password': self.password
+                },
+                max_lifetime=PG_POOL_RECYCLE_SECONDS,
+                # Connexion coupée côté serveur pendant une longue inactivité : détectée
+                # avant d'être prêtée, sans aller-retour pour les connexions récentes
+                check=_check_if_idle,
+                reset=_mark_idle,
+                open=True
             )
-            self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+            # Le pool ouvre ses connexions en arrière-plan : attendre qu'elles soient
+            # prêtes pour qu'un serveur injoignable fasse échouer connect()
+            self.pool.wait(timeout=PG_CONNECT_TIMEOUT_SECONDS)
             logger.info("Connexion à PostgreSQL établie")
             return True
-        except ImportError:
-            logger.error("Module psycopg2 non installé. Installez-le avec: pip install psycopg2-binary")
-            return False
         except Exception as e:
+            if self.pool:
+                self.pool.close()
+                self.pool = None
             logger.error(f"Erreur de connexion à PostgreSQL: {str(e)}")
             return False
     
+    def _conn(self):
+        """Emprunter une connexion au pool (rollback en cas d'erreur)"""
+        return self.pool.connection()
+    
     def create_tables(self):
         """Créer les tables PostgreSQL"""
         try:
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS produits (
-                    id SERIAL PRIMARY KEY,
-                    marque TEXT,
-                    modele TEXT NOT NULL,
-                    finitions TEXT,
-                    caracteristiques TEXT,
-                    prix TEXT,
-                    url TEXT,
-                    image TEXT,
-                    disponibilite TEXT,
-                    site_source TEXT,
-                    date_collecte TIMESTAMP DEFAULT NOW(),
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                )
-            """)
-            
-            # Créer des index
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_marque ON produits(marque)")
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_modele ON produits(modele)")
-            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_site ON produits(site_source)")
-            
-            self.conn.commit()
+            with self._conn() as conn, conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS produits (
+                        id SERIAL PRIMARY KEY,
+                        marque TEXT,
+                        modele TEXT NOT NULL,
+                        finitions TEXT,
+                        caracteristiques TEXT,
+                        prix TEXT,
+                        url TEXT,
+                        image TEXT,
+                        disponibilite TEXT,
+                        site_source TEXT,
+                        date_collecte TIMESTAMP DEFAULT NOW(),
+                        created_at TIMESTAMP DEFAULT NOW(),
+                        updated_at TIMESTAMP DEFAULT NOW()
+                    )
+                """)
+                
+                # Créer des index
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_marque ON produits(marque)")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_modele ON produits(modele)")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_site ON produits(site_source)")
+                
+                conn.commit()
+                
+                # Transaction séparée : un échec (doublons existants) n'annule pas le reste
+                try:
+                    cur.execute(UNIQUE_SITE_URL_INDEX)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.warning(f"Index unique (site_source, url) non créé: {str(e)}")
             logger.info("Tables PostgreSQL créées")
             return True
         except Exception as e:
@@ -417,66 +753,105 @@ class PostgreSQLDB(DatabaseInterface):
     def insert_products(self, products: List[Dict], site_source: str = "") -> int:
         """Insérer des produits dans PostgreSQL"""
         try:
-            count = 0
-            for product in products:
-                self.cursor.execute("""
-                    INSERT INTO produits (
-                        marque, modele, finitions, caracteristiques, 
-                        prix, url, image, disponibilite, site_source, date_collecte
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    product.get('marque', ''),
-                    product.get('modele', ''),
-                    product.get('finitions', ''),
-                    product.get('caracteristiques', ''),
-                    product.get('prix', ''),
-                    product.get('url', ''),
-                    product.get('image', ''),
-                    product.get('disponibilite', ''),
-                    site_source,
-                    datetime.now()
-                ))
-                count += 1
+            now = datetime.now()
+            rows = [
+                (*_pick_product({**_EMPTY_PRODUCT, **product}), site_source, now)
+                for product in products
+            ]
+            
+            with self._conn() as conn, conn.cursor() as cur:
+                if len(rows) >= PG_COPY_MIN_ROWS:
+                    # Gros lot : COPY, le chemin de chargement le plus rapide de PostgreSQL
+                    # COPY ne gère pas ON CONFLICT : passage par une table temporaire
+                    # limitée aux colonnes de données (sans le DEFAULT nextval() de id,
+                    # qui consommerait la séquence pour chaque ligne, doublons compris)
+                    cur.execute("""
+                        CREATE TEMP TABLE produits_staging ON COMMIT DROP AS
+                        SELECT marque, modele, finitions, caracteristiques, 
+                               prix, url, image, disponibilite, site_source, date_collecte
+                        FROM produits WITH NO DATA
+                    """)
+                    with cur.copy("""
+                        COPY produits_staging (
+                            marque, modele, finitions, caracteristiques, 
+                            prix, url, image, disponibilite, site_source, date_collecte
+                        ) FROM STDIN
+                    """) as copy:
+                        for row in rows:
+                            copy.write_row(row)
+                    cur.execute("""
+                        INSERT INTO produits (
+                            marque, modele, finitions, caracteristiques, 
+                            prix, url, image, disponibilite, site_source, date_collecte
+                        )
+                        SELECT marque, modele, finitions, caracteristiques, 
+                               prix, url, image, disponibilite, site_source, date_collecte
+                        FROM produits_staging
+                        ON CONFLICT DO NOTHING
+                    """)
+                else:
+                    # executemany en mode pipeline : un seul aller-retour réseau pour le lot
+                    cur.executemany("""
+                        INSERT INTO produits (
+                            marque, modele, finitions, caracteristiques, 
+                            prix, url, image, disponibilite, site_source, date_collecte
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        ON CONFLICT DO NOTHING
+                    """, rows)
+                count = cur.rowcount
+                conn.commit()
+            self._query_cache.clear()
             
-            self.conn.commit()
-            logger.info(f"{count} produits insérés dans PostgreSQL")
+            logger.info(f"{count} produits insérés dans PostgreSQL ({len(rows) - count} doublons ignorés)")
             return count
         except Exception as e:
             logger.error(f"Erreur insertion PostgreSQL: {str(e)}")
-            self.conn.rollback()
             return 0
     
     def get_products(self, filters: Optional[Dict] = None, limit: int = 100) -> List[Dict]:
         """Récupérer des produits depuis PostgreSQL"""
         try:
-            query = "SELECT * FROM produits WHERE 1=1"
-            params = []
+            cache_key = QueryCache.make_key(filters, limit)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            generation = self._query_cache.generation
             
-            if filters:
-                for key, value in filters.items():
-                    if value:
-                        query += f" AND {key} = %s"
-                        params.append(value)
+            active = {k: v for k, v in (filters or {}).items() if v}
+            keys = tuple(sorted(active))
+            query = _select_sql(keys, "%s")
+            params = [active[k] for k in keys] + [limit]
             
-            query += f" LIMIT {limit}"
+            with self._conn() as conn, conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(query, params)
+                rows = cur.fetchall()
             
-            self.cursor.execute(query, params)
-            return self.cursor.fetchall()
+            self._query_cache.set(cache_key, rows, generation)
+            return rows
         except Exception as e:
             logger.error(f"Erreur récupération PostgreSQL: {str(e)}")
             return []
     
+    def count_products(self) -> int:
+        """Compter les produits dans PostgreSQL"""
+        try:
+            with self._conn() as conn, conn.cursor() as cur:
+                cur.execute("SELECT COUNT(*) FROM produits")
+                return cur.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Erreur comptage PostgreSQL: {str(e)}")
+            return 0
+    
     def update_product(self, product_id: int, data: Dict) -> bool:
         """Mettre à jour un produit dans PostgreSQL"""
         try:
-            set_clause = ", ".join([f"{key} = %s" for key in data.keys()])
-            values = list(data.values()) + [product_id]
+            keys = tuple(sorted(data))
+            values = [data[k] for k in keys] + [product_id]
             
-            self.cursor.execute(
-                f"UPDATE produits SET {set_clause}, updated_at = NOW() WHERE id = %s",
-                values
-            )
-            self.conn.commit()
+            with self._conn() as conn, conn.cursor() as cur:
+                cur.execute(_update_sql(keys, "%s", "NOW()"), values)
+                conn.commit()
+            self._query_cache.clear()
             logger.info(f"Produit {product_id} mis à jour")
             return True
         except Exception as e:
@@ -486,8 +861,10 @@ class PostgreSQLDB(DatabaseInterface):
     def delete_product(self, product_id: int) -> bool:
         """Supprimer un produit de PostgreSQL"""
         try:
-            self.cursor.execute("DELETE FROM produits WHERE id = %s", (product_id,))
-            self.conn.commit()
+            with self._conn() as conn, conn.cursor() as cur:
+                cur.execute("DELETE FROM produits WHERE id = %s", (product_id,))
+                conn.commit()
+            self._query_cache.clear()
             logger.info(f"Produit {product_id} supprimé")
             return True
         except Exception as e:
@@ -495,14 +872,18 @@ class PostgreSQLDB(DatabaseInterface):
             return False
     
     def close(self):
-        """Fermer la connexion PostgreSQL"""
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
+        """Fermer toutes les connexions du pool PostgreSQL"""
+        if self.pool:
+            self.pool.close()
+            self.pool = None
         logger.info("Connexion PostgreSQL fermée")
 
 
+# Instances Supabase partagées, indexées par (url, clé)
+_SUPABASE_INSTANCES: Dict[tuple, SupabaseDB] = {}
+_SUPABASE_LOCK = threading.Lock()
+
+
 class DatabaseFactory:
     """Factory pour créer la bonne instance de base de données"""
     
@@ -512,10 +893,12 @@ class DatabaseFactory:
         db_type = config.get('type', 'sqlite').lower()
         
         if db_type == 'supabase':
-            return SupabaseDB(
-                url=config.get('url', ''),
-                key=config.get('key', '')
-            )
+            # Une seule instance (et un seul client HTTP) par projet Supabase
+            key = (config.get('url', ''), config.get('key', ''))
+            with _SUPABASE_LOCK:
+                if key not in _SUPABASE_INSTANCES:
+                    _SUPABASE_INSTANCES[key] = SupabaseDB(url=key[0], key=key[1])
+                return _SUPABASE_INSTANCES[key]
         
         elif db_type == 'postgresql':
             return PostgreSQLDB(
@@ -528,7 +911,8 @@ class DatabaseFactory:
         
         elif db_type == 'sqlite':
             return SQLiteDB(
-                db_path=config.get('path', 'data/scraper.db')
+                db_path=config.get('path', 'data/scraper.db'),
+                ephemeral=config.get('ephemeral', False)
             )
         
         else:
@@ -1,12 +1,86 @@
+import csv
+from collections import Counter
+import os
 import pandas as pd
 from pathlib import Path
-from datetime import datetime
+import time
 from typing import List, Dict, Optional
 import logging
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
+
+from json_utils import write_json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Style des en-têtes Excel
+HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+
+# Champs proposés à l'export (libellé affiché -> colonne)
+FIELD_MAPPING = {
+    'Marque': 'marque',
+    'Modèle': 'modele',
+    'Finitions': 'finitions',
+    'Caractéristiques': 'caracteristiques',
+    'Prix': 'prix',
+    'Stock': 'disponibilite',
+    'URL': 'url',
+    'Date de collecte': 'date_collecte'
+}
+
+# En-têtes français des exports Excel (colonne -> libellé)
+COLUMN_NAMES_FR = {
+    'marque': 'Marque',
+    'modele': 'Modèle',
+    'finitions': 'Finitions',
+    'caracteristiques': 'Caractéristiques',
+    'prix': 'Prix',
+    'url': 'URL',
+    'image': 'Image',
+    'disponibilite': 'Disponibilité',
+    'site_source': 'Site Source',
+    'date_collecte': 'Date de collecte'
+}
+
+
+def _field_keys(selected_fields: List[str]) -> List[str]:
+    """Convertir les champs sélectionnés en noms de colonnes"""
+    return [FIELD_MAPPING.get(field, field.lower()) for field in selected_fields]
+
+
+def _count_values(data: List[Dict], field: str) -> Optional[Counter]:
+    """Compter les valeurs non nulles d'un champ (None si aucun produit ne l'a)"""
+    counts = Counter(item[field] for item in data if field in item)
+    if not counts:
+        return None
+    counts.pop(None, None)
+    return counts
+
+
+def _records_to_df(data: List[Dict], selected_fields: Optional[List[str]] = None,
+                   headers: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Construire un DataFrame à partir de tuples aux colonnes connues
+    (ordre d'apparition des clés, restreint aux champs sélectionnés présents,
+    colonnes nommées directement d'après `headers`)
+    """
+    columns = list(dict.fromkeys(key for item in data for key in item))
+    if selected_fields:
+        present = frozenset(columns)
+        columns = [key for key in _field_keys(selected_fields) if key in present] or columns
+    names = [headers.get(key, key) for key in columns] if headers else columns
+    return pd.DataFrame.from_records([tuple(map(item.get, columns)) for item in data], columns=names)
+
+
+def _iter_rows(df: pd.DataFrame):
+    """Parcourir les lignes d'un DataFrame en tuples (valeurs manquantes -> None)"""
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
 
 class DataExporter:
     """
@@ -17,6 +91,19 @@ class DataExporter:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True, parents=True)
     
+    def _default_filename(self, prefix: str, extension: str) -> str:
+        """
+        Nom de fichier horodaté, suffixé s'il existe déjà
+        (deux exports dans la même seconde ne s'écrasent pas)
+        """
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        filename = f"{prefix}_{stamp}.{extension}"
+        n = 1
+        while (self.output_dir / filename).exists():
+            filename = f"{prefix}_{stamp}_{n}.{extension}"
+            n += 1
+        return filename
+    
     def export_to_csv(self, data: List[Dict], filename: str = None, 
                      selected_fields: Optional[List[str]] = None) -> str:
         """
@@ -27,38 +114,21 @@ class DataExporter:
             return None
         
         try:
-            # Créer un DataFrame
-            df = pd.DataFrame(data)
-            
-            # Sélectionner les champs si spécifié
-            if selected_fields:
-                # Mapper les noms français vers les noms de colonnes
-                field_mapping = {
-                    'Marque': 'marque',
-                    'Modèle': 'modele',
-                    'Finitions': 'finitions',
-                    'Caractéristiques': 'caracteristiques',
-                    'Prix': 'prix',
-                    'Stock': 'disponibilite',
-                    'URL': 'url',
-                    'Date de collecte': 'date_collecte'
-                }
-                
-                columns_to_keep = [field_mapping.get(field, field.lower()) 
-                                  for field in selected_fields 
-                                  if field_mapping.get(field, field.lower()) in df.columns]
-                
-                if columns_to_keep:
-                    df = df[columns_to_keep]
+            # Créer un DataFrame limité aux champs sélectionnés
+            df = _records_to_df(data, selected_fields)
             
             # Générer le nom de fichier
             if not filename:
-                filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                filename = self._default_filename('export', 'csv')
             
             filepath = self.output_dir / filename
             
-            # Exporter
-            df.to_csv(filepath, index=False, encoding='utf-8-sig')
+            # Exporter : csv.writer (C) sur les tuples, sans passer par DataFrame.to_csv
+            with open(filepath, 'w', encoding='utf-8-sig', newline='') as f:
+                # Fin de ligne de la plateforme, comme DataFrame.to_csv
+                writer = csv.writer(f, lineterminator=os.linesep)
+                writer.writerow(df.columns)
+                writer.writerows(_iter_rows(df))
             
             logger.info(f"Export CSV réussi: {filepath}")
             return str(filepath)
@@ -78,84 +148,19 @@ class DataExporter:
             return None
         
         try:
-            # Créer un DataFrame
-            df = pd.DataFrame(data)
-            
-            # Sélectionner les champs si spécifié
-            if selected_fields:
-                field_mapping = {
-                    'Marque': 'marque',
-                    'Modèle': 'modele',
-                    'Finitions': 'finitions',
-                    'Caractéristiques': 'caracteristiques',
-                    'Prix': 'prix',
-                    'Stock': 'disponibilite',
-                    'URL': 'url',
-                    'Date de collecte': 'date_collecte'
-                }
-                
-                columns_to_keep = [field_mapping.get(field, field.lower()) 
-                                  for field in selected_fields 
-                                  if field_mapping.get(field, field.lower()) in df.columns]
-                
-                if columns_to_keep:
-                    df = df[columns_to_keep]
-            
-            # Renommer les colonnes en français
-            column_names_fr = {
-                'marque': 'Marque',
-                'modele': 'Modèle',
-                'finitions': 'Finitions',
-                'caracteristiques': 'Caractéristiques',
-                'prix': 'Prix',
-                'url': 'URL',
-                'image': 'Image',
-                'disponibilite': 'Disponibilité',
-                'site_source': 'Site Source',
-                'date_collecte': 'Date de collecte'
-            }
-            
-            df = df.rename(columns=column_names_fr)
+            # Créer un DataFrame limité aux champs sélectionnés, en-têtes en français
+            df = _records_to_df(data, selected_fields, headers=COLUMN_NAMES_FR)
             
             # Générer le nom de fichier
             if not filename:
-                filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+                filename = self._default_filename('export', 'xlsx')
             
             filepath = self.output_dir / filename
             
-            # Créer le writer Excel
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-                
-                # Obtenir la feuille et formater
-                workbook = writer.book
-                worksheet = writer.sheets[sheet_name]
-                
-                # Ajuster la largeur des colonnes
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-                
-                # Formater l'en-tête
-                from openpyxl.styles import Font, PatternFill, Alignment
-                
-                header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-                header_font = Font(bold=True, color="FFFFFF")
-                
-                for cell in worksheet[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
+            # Écrire le classeur en flux (mode write_only)
+            workbook = Workbook(write_only=True)
+            self._write_sheet(workbook, sheet_name, df)
+            workbook.save(filepath)
             
             logger.info(f"Export Excel réussi: {filepath}")
             return str(filepath)
@@ -164,6 +169,42 @@ class DataExporter:
             logger.error(f"Erreur lors de l'export Excel: {str(e)}")
             return None
     
+    def _write_sheet(self, workbook, sheet_name: str, df: pd.DataFrame):
+        """
+        Écrire un DataFrame dans une feuille write_only (en-tête formaté)
+        """
+        # Largeur des colonnes : texte le plus long de chaque colonne, en-tête compris,
+        # calculé par pandas
+        widths = [len(str(column)) for column in df.columns]
+        if len(df):
+            lengths = df.fillna('').astype(str).apply(lambda column: column.str.len().max())
+            widths = [max(width, int(length)) for width, length in zip(widths, lengths)]
+        
+        self._write_rows(workbook, sheet_name, list(df.columns), _iter_rows(df), widths)
+    
+    def _write_rows(self, workbook, sheet_name: str, columns: List[str], rows, widths: List[int]):
+        """
+        Écrire des lignes (tuples ou listes) dans une feuille write_only (en-tête formaté)
+        """
+        worksheet = workbook.create_sheet(sheet_name)
+        
+        # Ajuster la largeur des colonnes (à définir avant d'écrire les lignes)
+        for i, width in enumerate(widths, start=1):
+            worksheet.column_dimensions[get_column_letter(i)].width = min(width + 2, 50)
+        
+        # Formater l'en-tête
+        header = []
+        for column in columns:
+            cell = WriteOnlyCell(worksheet, value=column)
+            cell.fill = HEADER_FILL
+            cell.font = HEADER_FONT
+            cell.alignment = HEADER_ALIGNMENT
+            header.append(cell)
+        worksheet.append(header)
+        
+        for row in rows:
+            worksheet.append(row)
+    
     def export_to_json(self, data: List[Dict], filename: str = None,
                       selected_fields: Optional[List[str]] = None) -> str:
         """
@@ -174,41 +215,19 @@ class DataExporter:
             return None
         
         try:
-            import json
-            
             # Filtrer les champs si nécessaire
             if selected_fields:
-                field_mapping = {
-                    'Marque': 'marque',
-                    'Modèle': 'modele',
-                    'Finitions': 'finitions',
-                    'Caractéristiques': 'caracteristiques',
-                    'Prix': 'prix',
-                    'Stock': 'disponibilite',
-                    'URL': 'url',
-                    'Date de collecte': 'date_collecte'
-                }
-                
-                filtered_data = []
-                for item in data:
-                    filtered_item = {
-                        field_mapping.get(field, field.lower()): item.get(field_mapping.get(field, field.lower()))
-                        for field in selected_fields
-                        if field_mapping.get(field, field.lower()) in item
-                    }
-                    filtered_data.append(filtered_item)
-                
-                data = filtered_data
+                keys = _field_keys(selected_fields)
+                data = [{key: item[key] for key in keys if key in item} for item in data]
             
             # Générer le nom de fichier
             if not filename:
-                filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                filename = self._default_filename('export', 'json')
             
             filepath = self.output_dir / filename
             
-            # Exporter
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # Exporter (orjson si disponible, écrit directement en octets)
+            write_json(filepath, data)
             
             logger.info(f"Export JSON réussi: {filepath}")
             return str(filepath)
@@ -224,25 +243,27 @@ class DataExporter:
         if not data:
             return {}
         
-        df = pd.DataFrame(data)
+        marques = _count_values(data, 'marque')
+        sites = _count_values(data, 'site_source')
+        disponibilite = _count_values(data, 'disponibilite')
         
         stats = {
-            'total_produits': len(df),
-            'marques_uniques': df['marque'].nunique() if 'marque' in df.columns else 0,
-            'sites_sources': df['site_source'].nunique() if 'site_source' in df.columns else 0,
+            'total_produits': len(data),
+            'marques_uniques': len(marques) if marques is not None else 0,
+            'sites_sources': len(sites) if sites is not None else 0,
         }
         
         # Produits par marque
-        if 'marque' in df.columns:
-            stats['produits_par_marque'] = df['marque'].value_counts().head(10).to_dict()
+        if marques is not None:
+            stats['produits_par_marque'] = dict(marques.most_common(10))
         
         # Produits par site
-        if 'site_source' in df.columns:
-            stats['produits_par_site'] = df['site_source'].value_counts().to_dict()
+        if sites is not None:
+            stats['produits_par_site'] = dict(sites.most_common())
         
         # Disponibilité
-        if 'disponibilite' in df.columns:
-            stats['disponibilite'] = df['disponibilite'].value_counts().to_dict()
+        if disponibilite is not None:
+            stats['disponibilite'] = dict(disponibilite.most_common())
         
         return stats
     
@@ -257,84 +278,46 @@ class DataExporter:
         try:
             # Générer le nom de fichier
             if not filename:
-                filename = f"rapport_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+                filename = self._default_filename('rapport', 'xlsx')
             
             filepath = self.output_dir / filename
             
-            # Créer le DataFrame principal
-            df = pd.DataFrame(data)
+            # Créer le DataFrame principal (en-têtes en français)
+            df = _records_to_df(data, headers=COLUMN_NAMES_FR)
+            
+            # Créer le classeur en flux (mode write_only)
+            workbook = Workbook(write_only=True)
             
-            # Renommer les colonnes
-            column_names_fr = {
-                'marque': 'Marque',
-                'modele': 'Modèle',
-                'finitions': 'Finitions',
-                'caracteristiques': 'Caractéristiques',
-                'prix': 'Prix',
-                'disponibilite': 'Disponibilité',
-                'site_source': 'Site Source',
-                'date_collecte': 'Date de collecte'
-            }
-            df = df.rename(columns=column_names_fr)
+            # Feuille principale
+            self._write_sheet(workbook, 'Données', df)
             
-            # Créer le writer
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Feuille principale
-                df.to_excel(writer, sheet_name='Données', index=False)
-                
-                # Feuille statistiques
-                stats = self.get_statistics(data)
-                
-                stats_data = []
-                stats_data.append(['Statistiques Générales', ''])
-                stats_data.append(['Total de produits', stats.get('total_produits', 0)])
-                stats_data.append(['Marques uniques', stats.get('marques_uniques', 0)])
-                stats_data.append(['Sites sources', stats.get('sites_sources', 0)])
+            # Feuille statistiques
+            stats = self.get_statistics(data)
+            
+            stats_data = []
+            stats_data.append(['Statistiques Générales', ''])
+            stats_data.append(['Total de produits', stats.get('total_produits', 0)])
+            stats_data.append(['Marques uniques', stats.get('marques_uniques', 0)])
+            stats_data.append(['Sites sources', stats.get('sites_sources', 0)])
+            stats_data.append(['', ''])
+            
+            if 'produits_par_marque' in stats:
+                stats_data.append(['Produits par Marque', ''])
+                for marque, count in stats['produits_par_marque'].items():
+                    stats_data.append([marque, count])
                 stats_data.append(['', ''])
-                
-                if 'produits_par_marque' in stats:
-                    stats_data.append(['Produits par Marque', ''])
-                    for marque, count in stats['produits_par_marque'].items():
-                        stats_data.append([marque, count])
-                    stats_data.append(['', ''])
-                
-                if 'produits_par_site' in stats:
-                    stats_data.append(['Produits par Site', ''])
-                    for site, count in stats['produits_par_site'].items():
-                        stats_data.append([site, count])
-                
-                stats_df = pd.DataFrame(stats_data, columns=['Indicateur', 'Valeur'])
-                stats_df.to_excel(writer, sheet_name='Statistiques', index=False)
-                
-                # Formater les feuilles
-                from openpyxl.styles import Font, PatternFill, Alignment
-                
-                for sheet_name in writer.sheets:
-                    worksheet = writer.sheets[sheet_name]
-                    
-                    # Ajuster les colonnes
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-                    
-                    # Formater l'en-tête
-                    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-                    header_font = Font(bold=True, color="FFFFFF")
-                    
-                    for cell in worksheet[1]:
-                        cell.fill = header_fill
-                        cell.font = header_font
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
+            
+            if 'produits_par_site' in stats:
+                stats_data.append(['Produits par Site', ''])
+                for site, count in stats['produits_par_site'].items():
+                    stats_data.append([site, count])
+            
+            # Quelques dizaines de lignes : écrites directement, sans DataFrame
+            stats_columns = ['Indicateur', 'Valeur']
+            stats_widths = [max(len(str(value)) for value in column)
+                            for column in zip(stats_columns, *stats_data)]
+            self._write_rows(workbook, 'Statistiques', stats_columns, stats_data, stats_widths)
+            workbook.save(filepath)
             
             logger.info(f"Rapport créé avec succès: {filepath}")
             return str(filepath)
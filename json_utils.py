@@ -0,0 +1,144 @@
+"""
+Lecture / écriture JSON rapide
+Utilise orjson si disponible, sinon la bibliothèque standard
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel
+    orjson = None
+
+# Fichiers déjà lus : chemin -> (mtime en ns, contenu)
+_FILE_CACHE: Dict[Path, Tuple[int, Any]] = {}
+
+
+def loads(raw) -> Any:
+    """Désérialiser du JSON (bytes ou str)"""
+    if orjson:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Sérialiser en JSON UTF-8 (bytes)"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+
+def read_json(path: Path, default: Any = None) -> Any:
+    """Lire un fichier JSON, retourne `default` s'il n'existe pas"""
+    path = Path(path)
+    if not path.exists():
+        return default
+    return loads(path.read_bytes())
+
+
+def _read_cached(path: Path, loader: Callable[[Path], Any], default: Any = None) -> Any:
+    """Lire un fichier via `loader`, sans le relire tant que son mtime ne change pas"""
+    path = Path(path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return default
+    cached = _FILE_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, loader(path))
+        _FILE_CACHE[path] = cached
+    return cached[1]
+
+
+def read_json_cached(path: Path, default: Any = None) -> Any:
+    """
+    Lire un fichier JSON en cache (invalidé au changement de mtime).
+    L'objet renvoyé est partagé : ne pas le modifier
+    """
+    return _read_cached(path, lambda p: loads(p.read_bytes()), default)
+
+
+def write_json(path: Path, obj: Any, indent: bool = True):
+    """
+    Écrire un objet dans un fichier JSON de manière atomique
+    (fichier temporaire + fsync + os.replace : jamais de fichier tronqué)
+    """
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(dumps(obj, indent=indent))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def replay_jsonl(path: Path, key: str = 'id') -> Tuple[List[Dict], int]:
+    """
+    Rejouer un journal JSONL en ajout seul : la dernière ligne d'une clé
+    l'emporte, une ligne {"_deleted": true} supprime l'enregistrement.
+    Retourne (enregistrements, nombre de lignes lues)
+    """
+    records = {}
+    lines = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            lines += 1
+            record = loads(line)
+            if record.get('_deleted'):
+                records.pop(record[key], None)
+            else:
+                records[record[key]] = record
+    return list(records.values()), lines
+
+
+def append_jsonl(path: Path, records: List[Dict]):
+    """Ajouter des enregistrements en fin de journal JSONL"""
+    with open(path, 'ab') as f:
+        f.write(b''.join(dumps(r) + b'\n' for r in records))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_jsonl(path: Path, records: List[Dict]):
+    """Réécrire un journal JSONL complet de manière atomique (compaction)"""
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(b''.join(dumps(r) + b'\n' for r in records))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def unique_ids(records: List[Dict], key: str = 'id') -> List[Dict]:
+    """
+    Attribuer un identifiant propre à chaque enregistrement. L'ancien sites.json
+    réutilisait les ids après suppression : le premier garde le sien, les doublons
+    (et les enregistrements sans id) reçoivent max + 1, max + 2... dans l'ordre
+    du fichier, donc toujours les mêmes d'une lecture à l'autre
+    """
+    next_id = max((r[key] for r in records if isinstance(r.get(key), int)), default=0) + 1
+    seen = set()
+    for record in records:
+        if record.get(key) is None or record[key] in seen:
+            record[key] = next_id
+            next_id += 1
+        seen.add(record[key])
+    return records
+
+
+def read_sites(data_dir: Path) -> List[Dict]:
+    """
+    Charger la liste des sites (en cache jusqu'au prochain changement) : journal
+    sites.jsonl, ou ancien fichier sites.json s'il n'a pas encore été migré
+    """
+    data_dir = Path(data_dir)
+    log_file = data_dir / "sites.jsonl"
+    if log_file.exists():
+        return _read_cached(log_file, lambda p: replay_jsonl(p)[0], default=[])
+    return _read_cached(data_dir / "sites.json", lambda p: unique_ids(loads(p.read_bytes())), default=[])
@@ -1,16 +1,41 @@
+from apscheduler.executors.pool import ThreadPoolExecutor as JobExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import atexit
 import logging
-import json
+import threading
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, Iterator, List, Dict, Optional
 from scraper import SmartScraper
-from database import DatabaseFactory
+from database import DatabaseFactory, DatabaseInterface
+from json_utils import dumps, loads, read_json_cached, read_sites
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Nombre de sites scrapés en parallèle par défaut (config['scheduler']['concurrency'])
+SCRAPE_MAX_WORKERS = 8
+
+# Exécuteur des jobs planifiés et délai de rattrapage d'une collecte manquée
+SCHEDULER_MAX_WORKERS = 4
+MISFIRE_GRACE_SECONDS = 60 * 60
+
+# Taille du tampon d'écriture du journal de collecte
+LOG_BUFFER_SIZE = 64 * 1024
+
+# Produits insérés en base par lot pendant la collecte d'un site
+INSERT_BATCH_SIZE = 500
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """Découper un itérable en listes de `size` éléments au plus"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
 
 class ScraperScheduler:
     """
@@ -18,38 +43,53 @@ class ScraperScheduler:
     """
     
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
+        # Collecte manquée (application arrêtée) : rattrapée une seule fois dans l'heure,
+        # jamais deux collectes en même temps
+        self.scheduler = BackgroundScheduler(
+            executors={'default': JobExecutor(max_workers=SCHEDULER_MAX_WORKERS)},
+            job_defaults={
+                'coalesce': True,
+                'max_instances': 1,
+                'misfire_grace_time': MISFIRE_GRACE_SECONDS
+            }
+        )
         self.data_dir = Path("data")
         self.logs_dir = self.data_dir / "logs"
         self.logs_dir.mkdir(exist_ok=True, parents=True)
+        # Les sites sont scrapés en parallèle : écritures du journal sérialisées
+        self._log_lock = threading.Lock()
+        # Journal du jour gardé ouvert (tamponné), vidé en fin de collecte
+        self._log_file = None
+        self._log_path = None
+        atexit.register(self.close_logs)
         
     def load_config(self) -> Dict:
         """Charger la configuration"""
-        config_file = self.data_dir / "config.json"
-        if config_file.exists():
-            with open(config_file, 'r') as f:
-                return json.load(f)
-        return {}
+        return read_json_cached(self.data_dir / "config.json", default={})
     
     def load_sites(self) -> List[Dict]:
         """Charger la liste des sites"""
-        sites_file = self.data_dir / "sites.json"
-        if sites_file.exists():
-            with open(sites_file, 'r') as f:
-                return json.load(f)
-        return []
+        return read_sites(self.data_dir)
     
     def load_credentials(self, site_id: int) -> Dict:
         """Charger les identifiants d'un site"""
-        cred_file = self.data_dir / "credentials" / f"{site_id}.json"
-        if cred_file.exists():
-            with open(cred_file, 'r') as f:
-                return json.load(f)
-        return {}
+        return read_json_cached(self.data_dir / "credentials" / f"{site_id}.json", default={})
     
-    def scrape_site(self, site: Dict) -> Dict:
+    def open_database(self, config: Optional[Dict] = None) -> Optional[DatabaseInterface]:
+        """Ouvrir la base de données configurée (None si la connexion échoue)"""
+        if config is None:
+            config = self.load_config()
+        
+        db = DatabaseFactory.create(config.get('database', {}))
+        if not db.connect():
+            return None
+        db.create_tables()
+        return db
+    
+    def scrape_site(self, site: Dict, db: Optional[DatabaseInterface] = None) -> Dict:
         """
         Scraper un site individuel
+        (db : connexion partagée par la collecte, sinon ouverte pour ce site)
         """
         logger.info(f"Début du scraping de {site['name']}...")
         
@@ -66,7 +106,7 @@ class ScraperScheduler:
         try:
             # Initialiser le scraper
             use_selenium = site.get('requires_auth', False)
-            scraper = SmartScraper(use_selenium=use_selenium)
+            scraper = SmartScraper(use_selenium=use_selenium, recipes_file=self.data_dir / "recipes.json")
             
             # Authentification si nécessaire
             if site.get('requires_auth', False):
@@ -88,28 +128,36 @@ class ScraperScheduler:
             
             # Scraper les produits
             selectors = site.get('selectors')
-            products = scraper.scrape_multiple_pages(
+            products = scraper.iter_multiple_pages(
                 site['url'],
                 max_pages=5,  # Limiter à 5 pages par défaut
                 selectors=selectors
             )
             
-            result['products_collected'] = len(products)
-            
-            # Sauvegarder dans la base de données
-            if products:
-                config = self.load_config()
-                db_config = config.get('database', {})
-                
-                db = DatabaseFactory.create(db_config)
-                if db.connect():
-                    db.create_tables()
-                    inserted = db.insert_products(products, site_source=site['name'])
-                    result['products_inserted'] = inserted
+            # Sauvegarder dans la base de données au fil de la collecte, par lots
+            own_db = db is None
+            db_error = False
+            try:
+                for batch in _batched(products, INSERT_BATCH_SIZE):
+                    result['products_collected'] += len(batch)
+                    if db_error:
+                        continue
+                    
+                    if db is None:
+                        db = self.open_database()
+                        if not db:
+                            db_error = True
+                            result['errors'].append("Erreur de connexion à la base de données")
+                            continue
+                    
+                    inserted = db.insert_products(batch, site_source=site['name'])
+                    result['products_inserted'] = result.get('products_inserted', 0) + inserted
+            finally:
+                if own_db and db:
                     db.close()
-                    logger.info(f"{inserted} produits sauvegardés dans la base de données")
-                else:
-                    result['errors'].append("Erreur de connexion à la base de données")
+            
+            if 'products_inserted' in result:
+                logger.info(f"{result['products_inserted']} produits sauvegardés dans la base de données")
             
             # Nettoyer
             scraper.close_driver()
@@ -146,10 +194,20 @@ class ScraperScheduler:
         
         logger.info(f"Scraping de {len(active_sites)} sites...")
         
-        results = []
-        for site in active_sites:
-            result = self.scrape_site(site)
-            results.append(result)
+        config = self.load_config()
+        
+        # Une seule connexion à la base pour toute la collecte
+        db = self.open_database(config)
+        
+        # Scraping limité par le réseau : les sites sont traités en parallèle
+        concurrency = config.get('scheduler', {}).get('concurrency', SCRAPE_MAX_WORKERS)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(active_sites)))) as executor:
+                results = list(executor.map(lambda site: self.scrape_site(site, db), active_sites))
+        finally:
+            if db:
+                db.close()
+            self.flush_logs()
         
         # Résumé
         total_products = sum(r.get('products_collected', 0) for r in results)
@@ -163,14 +221,36 @@ class ScraperScheduler:
         logger.info("========================================")
     
     def save_log(self, log_data: Dict):
-        """Sauvegarder un log de collecte"""
-        log_file = self.logs_dir / f"scraping_{datetime.now().strftime('%Y%m%d')}.jsonl"
+        """Sauvegarder un log de collecte (écrit dans le tampon du journal du jour)"""
+        log_path = self.logs_dir / f"scraping_{datetime.now().strftime('%Y%m%d')}.jsonl"
         
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(log_data, ensure_ascii=False) + '\n')
+        with self._log_lock:
+            # Changement de jour : passer au fichier suivant
+            if self._log_path != log_path:
+                if self._log_file:
+                    self._log_file.close()
+                self._log_file = open(log_path, 'ab', buffering=LOG_BUFFER_SIZE)
+                self._log_path = log_path
+            self._log_file.write(dumps(log_data) + b'\n')
+    
+    def flush_logs(self):
+        """Écrire sur disque les logs en attente"""
+        with self._log_lock:
+            if self._log_file:
+                self._log_file.flush()
+    
+    def close_logs(self):
+        """Fermer le journal du jour"""
+        with self._log_lock:
+            if self._log_file:
+                self._log_file.close()
+                self._log_file = None
+                self._log_path = None
     
     def get_logs(self, date: str = None, limit: int = 100) -> List[Dict]:
         """Récupérer les logs de collecte"""
+        self.flush_logs()
+        
         if date:
             log_file = self.logs_dir / f"scraping_{date}.jsonl"
             files = [log_file] if log_file.exists() else []
@@ -179,10 +259,11 @@ class ScraperScheduler:
         
         logs = []
         for file in files:
-            with open(file, 'r', encoding='utf-8') as f:
+            # Lecture en octets : orjson décode directement l'UTF-8
+            with open(file, 'rb') as f:
                 for line in f:
                     if line.strip():
-                        logs.append(json.loads(line))
+                        logs.append(loads(line))
                         if len(logs) >= limit:
                             return logs
         
@@ -216,6 +297,7 @@ class ScraperScheduler:
         """Arrêter le scheduler"""
         if self.scheduler.running:
             self.scheduler.shutdown()
+            self.flush_logs()
             logger.info("Scheduler arrêté")
     
     def is_running(self) -> bool:
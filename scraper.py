@@ -1,32 +1,213 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from typing import Dict, List, Optional
+from selenium.common.exceptions import TimeoutException
+from typing import Dict, Iterator, List, Optional
 import time
+from concurrent.futures import ThreadPoolExecutor
 import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
 from urllib.parse import urljoin, urlparse
 import logging
 
+from json_utils import read_json, write_json
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Pages d'un catalogue téléchargées en parallèle (mode requests)
+PAGE_FETCH_WORKERS = 4
+
+# Attentes Selenium (secondes) : chargement d'une page, contenu ajouté après un scroll
+PAGE_WAIT_SECONDS = 10
+SCROLL_WAIT_SECONDS = 2
+
+# Scroll en bas de page et hauteur mesurée dans le même appel (un seul aller-retour)
+SCROLL_TO_BOTTOM_JS = "var h = document.body.scrollHeight; window.scrollTo(0, h); return h;"
+PAGE_HEIGHT_JS = "return document.body.scrollHeight"
+
+# Éléments dont la présence indique que la page est prête
+PRODUCT_READY_SELECTOR = 'article.product-miniature, [class*="product"], [itemtype*="Product"]'
+LOGIN_FORM_SELECTOR = 'input[type="password"], form'
+
+# Sélecteurs des produits des plateformes courantes (essayés dans l'ordre)
+SITE_HINTS = {
+    'prestashop': ('article.product-miniature',),
+    'shopify': ('li.grid__item', '.product-card'),
+    'woocommerce': ('li.product',),
+}
+
+# Indices de plateforme cherchés dans <meta name="generator"> et les URLs des scripts
+PLATFORM_MARKERS = {
+    'prestashop': ('prestashop',),
+    'shopify': ('shopify',),
+    'woocommerce': ('woocommerce',),
+}
+
+# Connexions HTTP gardées ouvertes par hôte
+HTTP_POOL_SIZE = 32
+
+
+def _has_class(tag, pattern) -> bool:
+    """Vrai si l'une des classes de la balise correspond au motif"""
+    return any(pattern.search(css_class) for css_class in tag.get('class', ()))
+
+
+def _matches(tag, pattern: Dict) -> bool:
+    """Équivalent de find_all(attrs=pattern) pour une seule balise"""
+    for attr, expected in pattern.items():
+        if attr == 'class' and hasattr(expected, 'search'):
+            if not _has_class(tag, expected):
+                return False
+            continue
+        value = tag.get(attr)
+        if value is None:
+            return False
+        if expected is True:
+            continue
+        if hasattr(expected, 'search'):
+            if not expected.search(value):
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+@lru_cache(maxsize=64)
+def _url_root(base_url: str) -> str:
+    """Schéma et hôte de l'URL de la page (analysée une seule fois par page)"""
+    parsed = urlparse(base_url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def _absolute_url(base_url: str, href: str) -> str:
+    """urljoin, sans analyser d'URL pour les cas courants (URL absolue, chemin depuis la racine)"""
+    if href.startswith(('http://', 'https://')):
+        return href
+    # Segments "." / ".." : laissés à urljoin qui les résout
+    if href.startswith('/') and not href.startswith('//') and '/.' not in href:
+        return _url_root(base_url) + href
+    return urljoin(base_url, href)
+
 
 class SmartScraper:
     """
     Scraper intelligent capable de s'adapter à différentes structures de sites e-commerce
     """
     
-    def __init__(self, use_selenium: bool = False):
+    # Motifs de détection, compilés une seule fois pour toutes les pages.
+    # Patterns communs pour les containers de produits
+    _CONTAINER_PATTERNS = [
+        {'class': re.compile(r'product-item|product-card|item-card|product_item', re.I)},
+        {'class': re.compile(r'product|item', re.I)},
+        {'data-testid': re.compile(r'product', re.I)},
+        {'itemtype': 'https://schema.org/Product'}
+    ]
+    
+    # Marque
+    _BRAND_PATTERNS = [
+        {'class': re.compile(r'brand|manufacturer|marque', re.I)},
+        {'data-brand': True},
+        {'itemprop': 'brand'}
+    ]
+    
+    # Modèle
+    _MODEL_PATTERNS = [
+        {'class': re.compile(r'product-name|product-title|title|name|model', re.I)},
+        {'itemprop': 'name'},
+        {'data-name': True}
+    ]
+    
+    # Finitions / variantes : classe correspondante ou attribut data-variant
+    _FINISH_CLASS_RE = re.compile(r'variant|finish|color|colour|size|option', re.I)
+    
+    # Caractéristiques techniques : classe correspondante ou itemprop="description"
+    _SPECS_CLASS_RE = re.compile(r'spec|feature|characteristic|description|detail', re.I)
+    
+    # Prix
+    _PRICE_PATTERNS = [
+        {'class': re.compile(r'price|prix|cost', re.I)},
+        {'itemprop': 'price'},
+        {'data-price': True}
+    ]
+    
+    # Disponibilité
+    _AVAILABILITY_PATTERNS = [
+        {'class': re.compile(r'stock|availability|disponibilit', re.I)},
+        {'itemprop': 'availability'}
+    ]
+    
+    # Montant suivi d'un symbole monétaire
+    _PRICE_RE = re.compile(r'[\d\s]+[,.]?\d*\s*[€$£¥]')
+    
+    # Sélecteurs des formulaires de login déjà détectés, par site (partagés entre instances)
+    _login_selector_cache: Dict[str, Dict[str, str]] = {}
+    
+    # Plateforme détectée par site (None : inconnue), partagée entre instances
+    _platform_by_host: Dict[str, Optional[str]] = {}
+    
+    # Recettes par site : index du pattern gagnant de chaque champ (partagées entre instances)
+    _recipe_cache: Dict[str, Dict[str, int]] = {}
+    _recipe_lock = threading.Lock()
+    
+    def __init__(self, use_selenium: bool = False, recipes_file: Optional[str] = None):
         self.use_selenium = use_selenium
         self.driver = None
+        # Fichier JSON où les recettes sont conservées entre deux exécutions (optionnel)
+        self.recipes_file = Path(recipes_file) if recipes_file else None
+        if self.recipes_file:
+            self._load_recipes()
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            'User-Agent': USER_AGENT,
+            'Connection': 'keep-alive',
+            'Accept-Encoding': 'gzip, deflate'
         })
+        
+        # Connexions réutilisées entre les pages (keep-alive), nouvelles tentatives
+        # sur les erreurs transitoires du serveur
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def _load_recipes(self):
+        """Charger les recettes enregistrées (celles déjà en mémoire sont prioritaires)"""
+        try:
+            saved = read_json(self.recipes_file, default={})
+            with self._recipe_lock:
+                for host, recipe in saved.items():
+                    self._recipe_cache.setdefault(host, {
+                        field: index for field, index in recipe.items() if isinstance(index, int)
+                    })
+        except Exception as e:
+            logger.warning(f"Recettes ignorées ({self.recipes_file}): {str(e)}")
+    
+    def save_recipes(self):
+        """Enregistrer les recettes apprises dans `recipes_file`"""
+        if not self.recipes_file:
+            return
+        try:
+            with self._recipe_lock:
+                self.recipes_file.parent.mkdir(parents=True, exist_ok=True)
+                write_json(self.recipes_file, {host: dict(recipe) for host, recipe in self._recipe_cache.items()})
+        except Exception as e:
+            logger.warning(f"Erreur sauvegarde des recettes: {str(e)}")
     
     def init_driver(self):
         """Initialise le driver Selenium si nécessaire"""
@@ -56,15 +237,19 @@ class SmartScraper:
         try:
             self.init_driver()
             self.driver.get(url)
-            time.sleep(2)
+            # Attendre le formulaire (souvent injecté en JS) plutôt qu'un délai fixe
+            self._wait_for(EC.presence_of_element_located((By.CSS_SELECTOR, LOGIN_FORM_SELECTOR)))
             
             # Détection automatique des champs de login si non fournis
+            # (réutilise les sélecteurs déjà trouvés pour ce site)
+            host = urlparse(url).netloc
+            known = self._login_selector_cache.get(host, {})
             if not username_selector:
-                username_selector = self._detect_login_field('username')
+                username_selector = known.get('username') or self._detect_login_field('username')
             if not password_selector:
-                password_selector = self._detect_login_field('password')
+                password_selector = known.get('password') or self._detect_login_field('password')
             if not submit_selector:
-                submit_selector = self._detect_login_field('submit')
+                submit_selector = known.get('submit') or self._detect_login_field('submit')
             
             # Remplir les champs
             username_field = WebDriverWait(self.driver, 10).until(
@@ -78,8 +263,14 @@ class SmartScraper:
             submit_button = self.driver.find_element(By.CSS_SELECTOR, submit_selector)
             submit_button.click()
             
-            time.sleep(3)
+            # Rechargement de la page après envoi (absent pour les logins en AJAX)
+            self._wait_for(EC.staleness_of(submit_button), timeout=5)
             
+            self._login_selector_cache[host] = {
+                'username': username_selector,
+                'password': password_selector,
+                'submit': submit_selector
+            }
             logger.info("Authentification réussie")
             return True
             
@@ -114,75 +305,96 @@ class SmartScraper:
             ]
         }
         
+        # find_elements renvoie [] sans lever d'exception quand rien ne correspond
         for selector in selectors.get(field_type, []):
             try:
-                if self.driver.find_element(By.CSS_SELECTOR, selector):
+                if self.driver.find_elements(By.CSS_SELECTOR, selector):
                     return selector
             except:
-                continue
+                continue  # Sélecteur non supporté par le navigateur (:contains)
         
         return selectors[field_type][0]  # Retourne le premier par défaut
     
-    def scrape_page(self, url: str, selectors: Optional[Dict[str, str]] = None) -> List[Dict]:
+    def scrape_page(self, url: str, selectors: Optional[Dict[str, str]] = None,
+                    container_selector: Optional[str] = None) -> List[Dict]:
         """
         Scrape une page avec ou sans sélecteurs personnalisés
+        (container_selector : sélecteur CSS des produits, sans détection automatique)
         """
         try:
             if self.use_selenium or self.driver:
-                return self._scrape_with_selenium(url, selectors)
+                return self._scrape_with_selenium(url, selectors, container_selector)
             else:
-                return self._scrape_with_requests(url, selectors)
+                return self._scrape_with_requests(url, selectors, container_selector)
         except Exception as e:
             logger.error(f"Erreur lors du scraping de {url}: {str(e)}")
             return []
     
-    def _scrape_with_requests(self, url: str, selectors: Optional[Dict[str, str]]) -> List[Dict]:
+    def _scrape_with_requests(self, url: str, selectors: Optional[Dict[str, str]],
+                              container_selector: Optional[str] = None) -> List[Dict]:
         """Scraping avec requests (plus rapide, sans JS)"""
         response = self.session.get(url, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        return self._extract_products(soup, url, selectors)
+        soup = BeautifulSoup(response.content, 'lxml')
+        return self._extract_products(soup, url, selectors, container_selector)
     
-    def _scrape_with_selenium(self, url: str, selectors: Optional[Dict[str, str]]) -> List[Dict]:
+    def _scrape_with_selenium(self, url: str, selectors: Optional[Dict[str, str]],
+                              container_selector: Optional[str] = None) -> List[Dict]:
         """Scraping avec Selenium (supporte JS)"""
         self.init_driver()
         self.driver.get(url)
         
-        # Attendre que la page charge
-        time.sleep(3)
+        # Attendre l'apparition des produits (rendus en JS) plutôt qu'un délai fixe
+        self._wait_for(EC.presence_of_element_located((By.CSS_SELECTOR, PRODUCT_READY_SELECTOR)))
         
         # Scroll pour charger les produits lazy-loaded
         self._scroll_page()
         
-        soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-        return self._extract_products(soup, url, selectors)
+        soup = BeautifulSoup(self.driver.page_source, 'lxml')
+        return self._extract_products(soup, url, selectors, container_selector)
     
     def _scroll_page(self):
         """Scroll progressif pour charger tout le contenu"""
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
-        
         for _ in range(3):  # Maximum 3 scrolls
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
+            last_height = self.driver.execute_script(SCROLL_TO_BOTTOM_JS)
+            # Attendre que du contenu s'ajoute ; rien après le délai : fin de page
+            grew = self._wait_for(
+                lambda d: d.execute_script(PAGE_HEIGHT_JS) != last_height,
+                timeout=SCROLL_WAIT_SECONDS
+            )
+            if not grew:
                 break
-            last_height = new_height
+    
+    def _wait_for(self, condition, timeout: float = PAGE_WAIT_SECONDS) -> bool:
+        """Attendre une condition Selenium (False si le délai expire, sans erreur)"""
+        try:
+            WebDriverWait(self.driver, timeout).until(condition)
+            return True
+        except TimeoutException:
+            return False
     
     def _extract_products(self, soup: BeautifulSoup, base_url: str, 
-                         selectors: Optional[Dict[str, str]]) -> List[Dict]:
+                         selectors: Optional[Dict[str, str]],
+                         container_selector: Optional[str] = None) -> List[Dict]:
         """
         Extrait les produits de la page
         """
         products = []
         
+        host = urlparse(base_url).netloc
+        
         # Détection automatique des containers de produits
-        product_containers = self._detect_product_containers(soup)
+        product_containers = self._detect_product_containers(soup, container_selector, host)
+        
+        # Recette du site : le pattern gagnant d'un champ est essayé en premier
+        # sur les produits suivants au lieu de reprendre toute la cascade
+        with self._recipe_lock:
+            recipe = self._recipe_cache.setdefault(host, {})
         
         for container in product_containers:
             try:
-                product = self._extract_product_data(container, base_url, selectors)
+                product = self._extract_product_data(container, base_url, selectors, recipe)
                 if product and any(product.values()):  # Ne garder que les produits avec au moins une info
                     products.append(product)
             except Exception as e:
@@ -192,42 +404,76 @@ class SmartScraper:
         logger.info(f"Nombre de produits extraits: {len(products)}")
         return products
     
-    def _detect_product_containers(self, soup: BeautifulSoup) -> List:
+    def _detect_product_containers(self, soup: BeautifulSoup, container_selector: Optional[str] = None,
+                                   host: Optional[str] = None) -> List:
         """
         Détecte automatiquement les containers de produits
         """
-        # Patterns communs pour les containers de produits
-        common_patterns = [
-            {'class': re.compile(r'product-item|product-card|item-card|product_item', re.I)},
-            {'class': re.compile(r'product|item', re.I)},
-            {'data-testid': re.compile(r'product', re.I)},
-            {'itemtype': 'https://schema.org/Product'}
-        ]
-        
-        for pattern in common_patterns:
-            containers = soup.find_all(['div', 'article', 'li'], pattern, limit=100)
+        # Sélecteur fourni par l'appelant : pas de détection
+        if container_selector:
+            return soup.select(container_selector)
+        
+        # Plateforme connue : sélecteurs de son thème standard
+        platform = self._detect_platform(soup, host) if host else None
+        for hint in SITE_HINTS.get(platform, ()):
+            containers = soup.select(hint)
+            if containers:
+                logger.info(f"Containers détectés pour {platform}: {hint}")
+                return containers
+        
+        # Un seul parcours du document : chaque balise est testée contre tous les patterns
+        candidates = [[] for _ in self._CONTAINER_PATTERNS]
+        all_divs = []
+        for tag in soup.find_all(['div', 'article', 'li']):
+            for found, pattern in zip(candidates, self._CONTAINER_PATTERNS):
+                if len(found) < 100 and _matches(tag, pattern):
+                    found.append(tag)
+            if len(candidates[0]) >= 100:
+                break  # Le premier pattern l'emporte forcément
+            if tag.name == 'div' and tag.has_attr('class'):
+                all_divs.append(tag)
+        
+        for pattern, containers in zip(self._CONTAINER_PATTERNS, candidates):
             if len(containers) > 5:  # Au moins 5 produits détectés
                 logger.info(f"Containers détectés avec pattern: {pattern}")
                 return containers
         
         # Fallback: chercher les éléments répétitifs
-        all_divs = soup.find_all('div', class_=True)
-        class_counts = {}
-        for div in all_divs:
-            classes = ' '.join(div.get('class', []))
-            class_counts[classes] = class_counts.get(classes, 0) + 1
+        class_counts = Counter(tuple(div['class']) for div in all_divs)
         
         # Trouver la classe la plus fréquente (probablement les produits)
         if class_counts:
-            most_common_class = max(class_counts.items(), key=lambda x: x[1])
-            if most_common_class[1] >= 5:
-                logger.info(f"Classe la plus fréquente: {most_common_class[0]} ({most_common_class[1]} occurrences)")
-                return soup.find_all('div', class_=most_common_class[0].split())
+            classes, count = class_counts.most_common(1)[0]
+            if count >= 5:
+                logger.info(f"Classe la plus fréquente: {' '.join(classes)} ({count} occurrences)")
+                return soup.find_all('div', class_=list(classes))
         
         return []
     
+    def _detect_platform(self, soup: BeautifulSoup, host: str) -> Optional[str]:
+        """Détecte la plateforme e-commerce du site (une seule fois par hôte)"""
+        if host in self._platform_by_host:
+            return self._platform_by_host[host]
+        
+        # <meta name="generator"> et chemins des scripts (modules, CDN de la plateforme)
+        generator = soup.find('meta', attrs={'name': 'generator'})
+        clues = ' '.join([
+            generator.get('content', '') if generator else '',
+            *(script['src'] for script in soup.find_all('script', src=True, limit=50))
+        ]).lower()
+        
+        platform = next(
+            (name for name, markers in PLATFORM_MARKERS.items() if any(m in clues for m in markers)),
+            None
+        )
+        self._platform_by_host[host] = platform
+        if platform:
+            logger.info(f"Plateforme détectée pour {host}: {platform}")
+        return platform
+    
     def _extract_product_data(self, container, base_url: str, 
-                             selectors: Optional[Dict[str, str]]) -> Dict:
+                             selectors: Optional[Dict[str, str]],
+                             recipe: Optional[Dict[str, int]] = None) -> Dict:
         """
         Extrait les données d'un produit individuel
         """
@@ -250,13 +496,13 @@ class SmartScraper:
             product['caracteristiques'] = self._extract_text(container, selectors.get('specs', ''))
         else:
             # Détection automatique
-            product['marque'] = self._detect_brand(container)
-            product['modele'] = self._detect_model(container)
+            product['marque'] = self._detect_brand(container, recipe)
+            product['modele'] = self._detect_model(container, recipe)
             product['finitions'] = self._detect_finish(container)
             product['caracteristiques'] = self._detect_specs(container)
         
         # Extraire le prix
-        product['prix'] = self._detect_price(container)
+        product['prix'] = self._detect_price(container, recipe)
         
         # Extraire l'URL
         product['url'] = self._detect_url(container, base_url)
@@ -265,7 +511,7 @@ class SmartScraper:
         product['image'] = self._detect_image(container, base_url)
         
         # Disponibilité
-        product['disponibilite'] = self._detect_availability(container)
+        product['disponibilite'] = self._detect_availability(container, recipe)
         
         return product
     
@@ -279,33 +525,44 @@ class SmartScraper:
         except:
             return ''
     
-    def _detect_brand(self, container) -> str:
-        """Détecte automatiquement la marque"""
-        patterns = [
-            {'class': re.compile(r'brand|manufacturer|marque', re.I)},
-            {'data-brand': True},
-            {'itemprop': 'brand'}
-        ]
-        
-        for pattern in patterns:
-            element = container.find(['span', 'div', 'p', 'a'], pattern)
+    def _detect_with_recipe(self, container, field: str, tags: List[str], patterns: List[Dict],
+                            extract, recipe: Optional[Dict[str, int]]):
+        """
+        Essayer les patterns dans l'ordre (le gagnant mémorisé pour le site d'abord) ;
+        `extract` renvoie la valeur de l'élément trouvé, ou None pour passer au suivant
+        """
+        learned = recipe.get(field) if recipe is not None else None
+        order = range(len(patterns))
+        if learned is not None and learned < len(patterns):
+            order = [learned, *(i for i in order if i != learned)]
+        
+        for index in order:
+            element = container.find(tags, patterns[index])
             if element:
-                return element.get_text(strip=True)
+                value = extract(element)
+                if value is not None:
+                    if recipe is not None and learned != index:
+                        recipe[field] = index
+                    return value
         
-        return ''
+        return None
     
-    def _detect_model(self, container) -> str:
+    def _detect_brand(self, container, recipe: Optional[Dict[str, int]] = None) -> str:
+        """Détecte automatiquement la marque"""
+        brand = self._detect_with_recipe(
+            container, 'brand', ['span', 'div', 'p', 'a'], self._BRAND_PATTERNS,
+            lambda element: element.get_text(strip=True), recipe
+        )
+        return brand if brand is not None else ''
+    
+    def _detect_model(self, container, recipe: Optional[Dict[str, int]] = None) -> str:
         """Détecte automatiquement le modèle"""
-        patterns = [
-            {'class': re.compile(r'product-name|product-title|title|name|model', re.I)},
-            {'itemprop': 'name'},
-            {'data-name': True}
-        ]
-        
-        for pattern in patterns:
-            element = container.find(['h1', 'h2', 'h3', 'h4', 'a', 'span'], pattern)
-            if element:
-                return element.get_text(strip=True)
+        model = self._detect_with_recipe(
+            container, 'model', ['h1', 'h2', 'h3', 'h4', 'a', 'span'], self._MODEL_PATTERNS,
+            lambda element: element.get_text(strip=True), recipe
+        )
+        if model is not None:
+            return model
         
         # Fallback: premier titre trouvé
         title = container.find(['h1', 'h2', 'h3', 'h4', 'a'])
@@ -313,82 +570,68 @@ class SmartScraper:
     
     def _detect_finish(self, container) -> str:
         """Détecte automatiquement les finitions/variantes"""
-        patterns = [
-            {'class': re.compile(r'variant|finish|color|colour|size|option', re.I)},
-            {'data-variant': True}
-        ]
-        
-        finishes = []
-        for pattern in patterns:
-            elements = container.find_all(['span', 'div', 'li'], pattern)
-            for elem in elements:
-                text = elem.get_text(strip=True)
-                if text and len(text) < 50:
-                    finishes.append(text)
-        
-        return ', '.join(finishes) if finishes else ''
+        # Un seul parcours du container pour tous les critères
+        elements = container.find_all(
+            lambda tag: tag.name in ('span', 'div', 'li')
+            and (tag.has_attr('data-variant') or _has_class(tag, self._FINISH_CLASS_RE)),
+            limit=20  # Nuanciers de couleurs : inutile de tout parcourir
+        )
+        
+        return ', '.join(
+            text for text in (elem.get_text(strip=True) for elem in elements)
+            if text and len(text) < 50
+        )
     
     def _detect_specs(self, container) -> str:
         """Détecte automatiquement les caractéristiques techniques"""
-        patterns = [
-            {'class': re.compile(r'spec|feature|characteristic|description|detail', re.I)},
-            {'itemprop': 'description'}
-        ]
-        
-        specs = []
-        for pattern in patterns:
-            elements = container.find_all(['ul', 'div', 'p', 'span'], pattern, limit=5)
-            for elem in elements:
-                text = elem.get_text(strip=True)
-                if text and 10 < len(text) < 500:
-                    specs.append(text)
-        
-        return ' | '.join(specs[:3]) if specs else ''  # Max 3 specs
-    
-    def _detect_price(self, container) -> str:
+        # Un seul parcours du container pour tous les critères
+        elements = container.find_all(
+            lambda tag: tag.name in ('ul', 'div', 'p', 'span')
+            and (tag.get('itemprop') == 'description' or _has_class(tag, self._SPECS_CLASS_RE)),
+            limit=10
+        )
+        
+        # Max 3 specs : le texte des éléments suivants n'est pas extrait
+        return ' | '.join(islice(
+            (text for text in (elem.get_text(strip=True) for elem in elements)
+             if 10 < len(text) < 500),
+            3
+        ))
+    
+    def _detect_price(self, container, recipe: Optional[Dict[str, int]] = None) -> str:
         """Détecte automatiquement le prix"""
-        patterns = [
-            {'class': re.compile(r'price|prix|cost', re.I)},
-            {'itemprop': 'price'},
-            {'data-price': True}
-        ]
-        
-        for pattern in patterns:
-            element = container.find(['span', 'div', 'p'], pattern)
-            if element:
-                text = element.get_text(strip=True)
-                # Chercher un pattern de prix
-                price_match = re.search(r'[\d\s]+[,.]?\d*\s*[€$£¥]', text)
-                if price_match:
-                    return price_match.group(0)
-        
-        return ''
+        def extract(element):
+            # Chercher un pattern de prix
+            price_match = self._PRICE_RE.search(element.get_text(strip=True))
+            return price_match.group(0) if price_match else None
+        
+        price = self._detect_with_recipe(
+            container, 'price', ['span', 'div', 'p'], self._PRICE_PATTERNS, extract, recipe
+        )
+        return price if price is not None else ''
     
     def _detect_url(self, container, base_url: str) -> str:
         """Détecte automatiquement l'URL du produit"""
         link = container.find('a', href=True)
         if link:
-            return urljoin(base_url, link['href'])
+            return _absolute_url(base_url, link['href'])
         return ''
     
     def _detect_image(self, container, base_url: str) -> str:
         """Détecte automatiquement l'image du produit"""
         img = container.find('img', src=True)
         if img:
-            return urljoin(base_url, img['src'])
+            return _absolute_url(base_url, img['src'])
         return ''
     
-    def _detect_availability(self, container) -> str:
+    def _detect_availability(self, container, recipe: Optional[Dict[str, int]] = None) -> str:
         """Détecte automatiquement la disponibilité"""
-        patterns = [
-            {'class': re.compile(r'stock|availability|disponibilit', re.I)},
-            {'itemprop': 'availability'}
-        ]
-        
-        for pattern in patterns:
-            element = container.find(['span', 'div', 'p'], pattern)
-            if element:
-                return element.get_text(strip=True)
+        availability = self._detect_with_recipe(
+            container, 'availability', ['span', 'div', 'p'], self._AVAILABILITY_PATTERNS,
+            lambda element: element.get_text(strip=True), recipe
+        )
+        if availability is not None:
+            return availability
         
         # Chercher des mots-clés
         text = container.get_text().lower()
@@ -400,30 +643,76 @@ class SmartScraper:
         return 'Inconnu'
     
     def scrape_multiple_pages(self, url: str, max_pages: int = 10,
-                             selectors: Optional[Dict[str, str]] = None) -> List[Dict]:
+                             selectors: Optional[Dict[str, str]] = None,
+                             container_selector: Optional[str] = None) -> List[Dict]:
         """
         Scrape plusieurs pages d'un catalogue
         """
-        all_products = []
+        return list(self.iter_multiple_pages(url, max_pages, selectors, container_selector))
+    
+    def iter_multiple_pages(self, url: str, max_pages: int = 10,
+                            selectors: Optional[Dict[str, str]] = None,
+                            container_selector: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Scrape plusieurs pages d'un catalogue, les produits étant renvoyés page
+        après page (le catalogue complet n'est jamais gardé en mémoire)
+        """
+        if not (self.use_selenium or self.driver):
+            pages = self._iter_pages_concurrently(url, max_pages, selectors, container_selector)
+        else:
+            pages = self._iter_pages(url, max_pages, selectors, container_selector)
         
+        try:
+            for products in pages:
+                yield from products
+        finally:
+            pages.close()
+            self.save_recipes()
+    
+    def _iter_pages(self, url: str, max_pages: int, selectors: Optional[Dict[str, str]],
+                    container_selector: Optional[str] = None) -> Iterator[List[Dict]]:
+        """Scrape les pages une à une (navigateur), jusqu'à la première page vide"""
         for page in range(1, max_pages + 1):
             logger.info(f"Scraping page {page}/{max_pages}...")
             
             # Modifier l'URL pour la pagination (patterns communs)
             page_url = self._generate_page_url(url, page)
             
-            products = self.scrape_page(page_url, selectors)
+            products = self.scrape_page(page_url, selectors, container_selector)
             
             if not products:
                 logger.info(f"Aucun produit sur la page {page}, arrêt du scraping")
                 break
             
-            all_products.extend(products)
+            yield products
             
             # Pause entre les pages
             time.sleep(2)
+    
+    def _iter_pages_concurrently(self, url: str, max_pages: int, selectors: Optional[Dict[str, str]],
+                                 container_selector: Optional[str] = None) -> Iterator[List[Dict]]:
+        """
+        Scrape les pages en parallèle (requests, sans navigateur) ;
+        les résultats sont repris dans l'ordre et s'arrêtent à la première page vide
+        """
+        page_urls = [self._generate_page_url(url, page) for page in range(1, max_pages + 1)]
         
-        return all_products
+        executor = ThreadPoolExecutor(max_workers=max(1, min(PAGE_FETCH_WORKERS, max_pages)))
+        try:
+            pages = executor.map(
+                lambda page_url: self.scrape_page(page_url, selectors, container_selector), page_urls
+            )
+            for page, products in enumerate(pages, start=1):
+                logger.info(f"Scraping page {page}/{max_pages}...")
+                
+                if not products:
+                    logger.info(f"Aucun produit sur la page {page}, arrêt du scraping")
+                    break
+                
+                yield products
+        finally:
+            # Abandonner les pages au-delà de la première page vide
+            executor.shutdown(wait=True, cancel_futures=True)
     
     def _generate_page_url(self, base_url: str, page: int) -> str:
         """Génère l'URL pour une page spécifique"""
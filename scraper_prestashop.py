@@ -3,31 +3,117 @@ Scraper générique pour tous les sites PrestaShop
 Réutilisable pour n'importe quel site utilisant PrestaShop
 """
 
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from lxml import html
+from lxml.cssselect import CSSSelector
+import hashlib
 import time
 from datetime import datetime
+from typing import Set
+
+from json_utils import read_json_cached
+from scraper import (PAGE_HEIGHT_JS, PAGE_WAIT_SECONDS, SCROLL_TO_BOTTOM_JS,
+                     SCROLL_WAIT_SECONDS, USER_AGENT)
+
+# PrestaShop sert toujours ses pages en UTF-8 (même sans <meta charset>)
+HTML_PARSER = html.HTMLParser(encoding='utf-8')
+
+
+def _empreinte(url):
+    """Empreinte 64 bits d'une URL (blake2b), pour le dédoublonnage"""
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), 'big')
+
+
+def _texte(element):
+    """Texte d'un élément, morceaux nettoyés et concaténés"""
+    return ''.join(morceau.strip() for morceau in element.itertext())
+
 
 class PrestaShopScraper:
     """Scraper universel pour sites PrestaShop"""
     
-    def __init__(self):
+    # Sélecteurs CSS de la structure PrestaShop standard, compilés une seule fois
+    _SEL_PRODUIT = CSSSelector('article.product-miniature')
+    _SEL_LIEN = CSSSelector('a.product-thumbnail')
+    # Titre : h3.h3, sinon h2.h3, sinon a.product-title (par ordre de priorité)
+    _SEL_TITRES = (CSSSelector('h3.h3'), CSSSelector('h2.h3'), CSSSelector('a.product-title'))
+    _SEL_PRIX = CSSSelector('span.price')
+    _SEL_IMAGE = CSSSelector('img')
+    _SEL_DESCRIPTION = CSSSelector('div.product-description-short')
+    
+    def __init__(self, use_selenium: bool = False):
+        # Les pages PrestaShop sont rendues côté serveur : requests suffit,
+        # Selenium ne sert qu'aux sites qui chargent les produits en JavaScript
+        self.use_selenium = use_selenium
         self.driver = None
-        self.urls_vues = set()
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        # Empreintes 64 bits des URLs déjà collectées (bien plus compactes que les URLs)
+        self.urls_vues: Set[int] = set()
         
     def init_driver(self):
-        """Initialiser Selenium"""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        self.driver = webdriver.Chrome(options=chrome_options)
+        """Initialiser Selenium si nécessaire (un seul Chrome pour tous les catalogues)"""
+        if not self.driver:
+            chrome_options = Options()
+            chrome_options.add_argument('--headless')
+            chrome_options.add_argument('--no-sandbox')
+            chrome_options.add_argument('--disable-dev-shm-usage')
+            self.driver = webdriver.Chrome(options=chrome_options)
     
     def close_driver(self):
         """Fermer Selenium"""
         if self.driver:
             self.driver.quit()
+            self.driver = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_driver()
+    
+    def __del__(self):
+        """Nettoyage"""
+        self.close_driver()
+    
+    def _charger_page(self, url, use_selenium):
+        """Charger et parser une page (requests, ou Selenium pour les sites en JS)"""
+        if not use_selenium:
+            # Le parseur lit directement le flux réseau (décompressé à la volée) :
+            # pas de copie complète de la page en mémoire avant le parsing
+            with self.session.get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                racine = html.parse(response.raw, parser=HTML_PARSER).getroot()
+            return racine if racine is not None else html.Element('html')
+        
+        self.init_driver()
+        self.driver.get(url)
+        
+        # Attendre les produits plutôt qu'un délai fixe (page vide : délai écoulé)
+        try:
+            WebDriverWait(self.driver, PAGE_WAIT_SECONDS).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, 'article.product-miniature'))
+            )
+        except TimeoutException:
+            return html.fromstring(self.driver.page_source, parser=HTML_PARSER)
+        
+        # Scroll pour lazy loading, puis attendre que du contenu s'ajoute
+        hauteur = self.driver.execute_script(SCROLL_TO_BOTTOM_JS)
+        try:
+            WebDriverWait(self.driver, SCROLL_WAIT_SECONDS).until(
+                lambda d: d.execute_script(PAGE_HEIGHT_JS) != hauteur
+            )
+        except TimeoutException:
+            pass
+        
+        return html.fromstring(self.driver.page_source, parser=HTML_PARSER)
     
     def scraper_catalogue(self, url_catalogue, nom_site, max_pages=5, sauvegarder=True):
         """
@@ -49,8 +135,30 @@ class PrestaShopScraper:
         print(f"📄 Pages: {max_pages}")
         print("=" * 70)
         
-        self.init_driver()
-        tous_les_produits = []
+        tous_les_produits = list(self.iter_catalogue(url_catalogue, max_pages))
+        
+        # Le driver reste ouvert pour les catalogues suivants (fermé par close_driver / with)
+        
+        # Afficher résumé
+        print("\n" + "=" * 70)
+        print(f"📊 RÉSULTATS: {len(tous_les_produits)} produits uniques collectés")
+        print("=" * 70)
+        
+        if tous_les_produits:
+            self._afficher_echantillon(tous_les_produits)
+            
+            if sauvegarder:
+                self._sauvegarder_produits(tous_les_produits, nom_site)
+        
+        return tous_les_produits
+    
+    def iter_catalogue(self, url_catalogue, max_pages=5):
+        """
+        Parcourir un catalogue PrestaShop en renvoyant chaque produit unique
+        dès son extraction (sans garder tout le catalogue en mémoire)
+        """
+        use_selenium = self.use_selenium
+        total = 0
         
         for page in range(1, max_pages + 1):
             print(f"\n📄 Page {page}/{max_pages}")
@@ -64,22 +172,23 @@ class PrestaShopScraper:
             
             print(f"   🔗 {url[:60]}...")
             
-            # Charger la page
-            self.driver.get(url)
-            time.sleep(3)
-            
-            # Scroll pour lazy loading
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            # Charger la page, parser avec lxml et trouver les produits (structure
+            # PrestaShop standard). Page en erreur (hors pagination, réseau) : traitée
+            # comme une page vide, les produits déjà collectés sont conservés
+            try:
+                produits = self._SEL_PRODUIT(self._charger_page(url, use_selenium))
+            except requests.RequestException as e:
+                print(f"   ⚠️  Page inaccessible: {e}")
+                produits = []
             
-            # Parser avec BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            # Trouver les produits (structure PrestaShop standard)
-            produits = soup.find_all('article', class_='product-miniature')
+            # Aucun produit dans le HTML statique : site rendu en JavaScript
+            if not produits and page == 1 and not use_selenium:
+                print("   ↪️  Aucun produit dans le HTML, passage à Selenium")
+                use_selenium = True
+                produits = self._SEL_PRODUIT(self._charger_page(url, use_selenium))
             
             if not produits:
-                print(f"   ⚠️  Aucun produit trouvé sur cette page")
+                print("   ⚠️  Aucun produit trouvé sur cette page")
                 break
             
             print(f"   🔍 {len(produits)} produits détectés")
@@ -90,63 +199,53 @@ class PrestaShopScraper:
                 try:
                     produit_data = self._extraire_produit(produit)
                     
-                    if produit_data and produit_data['url'] not in self.urls_vues:
-                        self.urls_vues.add(produit_data['url'])
-                        tous_les_produits.append(produit_data)
-                        produits_page += 1
+                    if not produit_data:
+                        continue
+                    empreinte = _empreinte(produit_data['url'])
+                    if empreinte in self.urls_vues:
+                        continue
+                    self.urls_vues.add(empreinte)
                 
-                except Exception as e:
+                except Exception:
                     continue
+                
+                produits_page += 1
+                yield produit_data
             
+            total += produits_page
             print(f"   ✅ {produits_page} produits uniques collectés")
-            print(f"   📊 Total: {len(tous_les_produits)} produits")
+            print(f"   📊 Total: {total} produits")
             
             time.sleep(2)  # Pause entre pages
-        
-        self.close_driver()
-        
-        # Afficher résumé
-        print(f"\n" + "=" * 70)
-        print(f"📊 RÉSULTATS: {len(tous_les_produits)} produits uniques collectés")
-        print("=" * 70)
-        
-        if tous_les_produits:
-            self._afficher_echantillon(tous_les_produits)
-            
-            if sauvegarder:
-                self._sauvegarder_produits(tous_les_produits, nom_site)
-        
-        return tous_les_produits
     
     def _extraire_produit(self, produit):
         """Extraire les données d'un produit PrestaShop"""
         
         # URL
-        lien = produit.find('a', class_='product-thumbnail')
-        if not lien or not lien.get('href'):
+        liens = self._SEL_LIEN(produit)
+        if not liens or not liens[0].get('href'):
             return None
-        url_produit = lien['href']
+        url_produit = liens[0].get('href')
         
         # Titre
-        titre_elem = produit.find('h3', class_='h3')
-        if not titre_elem:
-            titre_elem = produit.find('h2', class_='h3')
-        if not titre_elem:
-            titre_elem = produit.find('a', class_='product-title')
-        
-        titre = titre_elem.get_text(strip=True) if titre_elem else ''
+        titre = ''
+        for selecteur in self._SEL_TITRES:
+            titres = selecteur(produit)
+            if titres:
+                titre = _texte(titres[0])
+                break
         if not titre or len(titre) < 3:
             return None
         
         # Prix
-        prix_elem = produit.find('span', class_='price')
-        prix = prix_elem.get_text(strip=True) if prix_elem else ''
+        prix_elems = self._SEL_PRIX(produit)
+        prix = _texte(prix_elems[0]) if prix_elems else ''
         
         # Image
-        img = produit.find('img')
+        imgs = self._SEL_IMAGE(produit)
         image_url = ''
-        if img:
-            image_url = img.get('data-src', img.get('src', ''))
+        if imgs:
+            image_url = imgs[0].get('data-src', imgs[0].get('src', ''))
         
         # Marque (extraite du titre)
         marque = ''
@@ -157,8 +256,8 @@ class PrestaShopScraper:
                 marque = premier_mot
         
         # Description courte
-        desc = produit.find('div', class_='product-description-short')
-        caracteristiques = desc.get_text(strip=True) if desc else ''
+        descs = self._SEL_DESCRIPTION(produit)
+        caracteristiques = _texte(descs[0]) if descs else ''
         
         return {
             'modele': titre,
@@ -188,7 +287,6 @@ class PrestaShopScraper:
         
         if save == 'o':
             # Charger la configuration pour utiliser la bonne base de données
-            import json
             from pathlib import Path
             
             config_file = Path("data/config.json")
@@ -197,30 +295,30 @@ class PrestaShopScraper:
             # Lire la config si elle existe
             if config_file.exists():
                 try:
-                    with open(config_file, 'r') as f:
-                        config = json.load(f)
+                    # Lecture orjson, mise en cache jusqu'à modification du fichier
+                    config = read_json_cached(config_file, default={})
                     
                     db_type = config.get('database', {}).get('type', 'sqlite')
                     
                     if db_type == 'supabase':
-                        print(f"   📊 Utilisation de Supabase...")
+                        print("   📊 Utilisation de Supabase...")
                         from database import SupabaseDB
                         db = SupabaseDB(
                             config['database']['url'],
                             config['database']['key']
                         )
                     else:
-                        print(f"   📊 Utilisation de SQLite...")
+                        print("   📊 Utilisation de SQLite...")
                         from database import SQLiteDB
                         db = SQLiteDB(db_path="data/scraper.db")
                 except Exception as e:
                     print(f"   ⚠️ Erreur lecture config: {e}")
-                    print(f"   📊 Utilisation de SQLite par défaut...")
+                    print("   📊 Utilisation de SQLite par défaut...")
                     from database import SQLiteDB
                     db = SQLiteDB(db_path="data/scraper.db")
             else:
                 # Pas de config, utiliser SQLite par défaut
-                print(f"   📊 Pas de config trouvée, utilisation de SQLite...")
+                print("   📊 Pas de config trouvée, utilisation de SQLite...")
                 from database import SQLiteDB
                 db = SQLiteDB(db_path="data/scraper.db")
             
@@ -229,9 +327,9 @@ class PrestaShopScraper:
                 db.create_tables()
                 count = db.insert_products(produits, site_source=nom_site)
                 
-                all_products = db.get_products()
+                total = db.count_products()
                 print(f"\n✅ {count} produits sauvegardés!")
-                print(f"📊 Total en base: {len(all_products)} produits")
+                print(f"📊 Total en base: {total} produits")
                 db.close()
                 
                 # Proposer export
@@ -250,7 +348,7 @@ class PrestaShopScraper:
         
         if fichier:
             print(f"\n✅ Export réussi: {fichier}")
-            print(f"📂 Dossier: data/exports/")
+            print("📂 Dossier: data/exports/")
 
 
 # Fonction simple pour utilisation directe
@@ -265,8 +363,8 @@ def scraper_prestashop_simple(url, nom_site, max_pages=5):
             max_pages=3
         )
     """
-    scraper = PrestaShopScraper()
-    return scraper.scraper_catalogue(url, nom_site, max_pages)
+    with PrestaShopScraper() as scraper:
+        return scraper.scraper_catalogue(url, nom_site, max_pages)
 
 
 if __name__ == "__main__":